@@ -18,11 +18,17 @@ urlpatterns = [
     # Movie URLs
     path('movies/', get_all_movies, name='get_all_movies'),
     path('movies/add/', add_movie, name='add_movie'),
+    path('movies/bulk/', bulk_add_movies, name='bulk_add_movies'),
+    path('movies/search/', search_movies, name='search_movies'),
+    path('movies/cache-stats/', get_movie_cache_stats, name='get_movie_cache_stats'),
     path('movies/<str:movie_id>/', get_movie_detail, name='get_movie_detail'),
+    path('imdb/search/', search_imdb, name='search_imdb'),
+    path('imdb/titles/<str:movie_id>/', get_imdb_title, name='get_imdb_title'),
     
     # Review URLs
     path('movies/<str:movie_id>/reviews/', get_movie_reviews, name='get_movie_reviews'),
     path('movies/<str:movie_id>/reviews/create/', create_review, name='create_review'),
+    path('movies/<str:movie_id>/similar/', get_similar_movies, name='get_similar_movies'),
     path('reviews/<int:review_id>/', manage_review, name='manage_review'),
     path('users/reviews/', get_user_reviews, name='get_user_reviews'),
     
@@ -30,14 +36,20 @@ urlpatterns = [
     path('watch-later/', get_watch_later, name='get_watch_later'),
     path('watch-later/add/<str:movie_id>/', add_to_watch_later, name='add_to_watch_later'),
     path('watch-later/remove/<str:movie_id>/', remove_from_watch_later, name='remove_from_watch_later'),
+    path('watch-later/bulk/add/', bulk_add_to_watch_later, name='bulk_add_to_watch_later'),
+    path('watch-later/bulk/remove/', bulk_remove_from_watch_later, name='bulk_remove_from_watch_later'),
     path('users/watch-later/', get_user_watch_later, name='get_user_watch_later'),
     
     # Watchlist URLs (for watched movies)
     path('watchlist/', get_watchlist, name='get_watchlist'),
     path('watchlist/add/<str:movie_id>/', add_to_watchlist, name='add_to_watchlist'),
     path('watchlist/remove/<str:movie_id>/', remove_from_watchlist, name='remove_from_watchlist'),
+    path('watchlist/bulk/add/', bulk_add_to_watchlist, name='bulk_add_to_watchlist'),
+    path('watchlist/bulk/remove/', bulk_remove_from_watchlist, name='bulk_remove_from_watchlist'),
     path('users/watchlist/', get_user_watchlist, name='get_user_watchlist'),
     
+    path('users/movie-states/', get_movie_states, name='get_movie_states'),
+    
     # Analytics URLs
     path('users/statistics/', get_user_statistics, name='get_user_statistics'),
     path('users/recent-activity/', get_recent_activity, name='get_recent_activity'),
@@ -45,4 +57,6 @@ urlpatterns = [
     path('users/analytics/ratings/', get_rating_analytics, name='get_rating_analytics'),
     path('users/analytics/watch-history/', get_watch_history, name='get_watch_history'),
     path('users/analytics/highlights/', get_user_highlights, name='get_user_highlights'),
+    path('users/analytics/dashboard/', get_analytics_dashboard, name='get_analytics_dashboard'),
+    path('users/recommendations/', get_recommendations, name='get_recommendations'),
 ]
@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import Movie, Review, WatchLater, Watchlist
+from .models import (Movie, Genre, MovieGenre, MovieNeighbor, Review, UserDailyActivity, UserRecommendation,
+                     UserStats, WatchLater, Watchlist)
 
 
 admin.site.register(Movie)
+admin.site.register(Genre)
+admin.site.register(MovieGenre)
 admin.site.register(Review)
 admin.site.register(WatchLater)
 admin.site.register(Watchlist)
+admin.site.register(UserStats)
+admin.site.register(UserDailyActivity)
+admin.site.register(MovieNeighbor)
+admin.site.register(UserRecommendation)
@@ -0,0 +1,334 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, OuterRef, Q, StdDev, Subquery
+from django.utils import timezone
+
+from .genres import normalize_genres
+from .models import MovieGenre, Review, Watchlist
+from .user_activity import load_daily_activity
+from .user_stats import get_user_stats
+
+TRENDING_WINDOW = timedelta(days=30)
+TIMEFRAMES = {'week': 7, 'month': 30, 'year': 365}
+DASHBOARD_SECTIONS = ['statistics', 'genres', 'ratings', 'watch_history', 'highlights']
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_DASHBOARD_CACHE_TIMEOUT', 60)
+
+
+def load_watched_movies(user, since=None):
+    """
+    The user's watched movies with the movie columns analytics need and the
+    user's own rating (or None), fetched in a single query.
+    """
+    own_rating = Review.objects.filter(user=user, movie=OuterRef('movie_id')).values('rating')[:1]
+    watches = Watchlist.objects.filter(user=user)
+    if since is not None:
+        watches = watches.filter(watched_at__gte=since)
+    return list(
+        watches.annotate(user_rating=Subquery(own_rating))
+        .order_by('watched_at', 'id')
+        .values('movie_id', 'watched_at', 'movie__title', 'movie__runtime_minutes',
+                'movie__genres', 'user_rating')
+    )
+
+
+def user_statistics(stats):
+    genre_counts = stats.genre_counts
+    most_watched = max(genre_counts, key=lambda genre: (genre_counts[genre], genre)) if genre_counts else None
+
+    total_watched = stats.watched_count
+    total_reviewed = stats.review_count
+    completion_rate = (total_reviewed / total_watched * 100) if total_watched > 0 else 0
+
+    return {
+        "total_movies_watched": total_watched,
+        "total_reviews": total_reviewed,
+        "average_rating": stats.rating_sum / total_reviewed if total_reviewed else 0,
+        "watchlist_count": total_watched,
+        "watch_later_count": stats.watch_later_count,
+        "total_genres_watched": len(genre_counts),
+        "most_watched_genre": most_watched,
+        "review_completion_rate": round(completion_rate, 1)
+    }
+
+
+def genre_analytics(watches, now=None):
+    """Genre distribution, per-genre average rating and trending genres in one pass."""
+    trending_since = (now or timezone.now()) - TRENDING_WINDOW
+    counts = defaultdict(int)
+    recent = defaultdict(int)
+    rating_totals = defaultdict(lambda: [0.0, 0])
+
+    for watch in watches:
+        is_recent = watch['watched_at'] >= trending_since
+        rating = watch['user_rating']
+        for genre in normalize_genres(watch['movie__genres']):
+            counts[genre] += 1
+            if is_recent:
+                recent[genre] += 1
+            if rating is not None:
+                rating_totals[genre][0] += rating
+                rating_totals[genre][1] += 1
+
+    favorite_genres = []
+    for genre, count in counts.items():
+        total, rated = rating_totals.get(genre, (0.0, 0))
+        favorite_genres.append({
+            "genre": genre,
+            "movie_count": count,
+            "average_rating": round(total / rated, 1) if rated else None
+        })
+    trending_genres = [
+        {"genre": genre, "recent_watches": count, "last_30_days": True}
+        for genre, count in recent.items()
+    ]
+
+    return {
+        "distribution": dict(counts),
+        "favorite_genres": sorted(favorite_genres, key=lambda x: x['movie_count'], reverse=True),
+        "trending_genres": sorted(trending_genres, key=lambda x: x['recent_watches'], reverse=True)
+    }
+
+
+def _stars(stars):
+    # round() rounds halves to even (2.5 -> 2, 3.5 -> 4, 4.5 -> 4); these
+    # ranges reproduce that on the database side for ratings out of 5
+    if stars == 5:
+        return Q(rating__gt=4.5)
+    if stars == 4:
+        return Q(rating__gte=3.5, rating__lte=4.5)
+    if stars == 3:
+        return Q(rating__gt=2.5, rating__lt=3.5)
+    if stars == 2:
+        return Q(rating__gte=1.5, rating__lte=2.5)
+    return Q(rating__lt=1.5)
+
+
+def _percentile(histogram, count, fraction):
+    """Linearly interpolated percentile from ``[(value, count), ...]`` sorted by value."""
+    position = fraction * (count - 1)
+    lower_rank = int(position)
+    lower = upper = None
+    seen = 0
+    for value, value_count in histogram:
+        seen += value_count
+        if lower is None and seen > lower_rank:
+            lower = value
+        if seen > lower_rank + 1 or seen == count:
+            upper = value
+            break
+    return lower + (upper - lower) * (position - lower_rank)
+
+
+def rating_analytics(user, now=None):
+    """
+    Star distribution, spread, percentiles, per-genre averages and the
+    30-day trend of the user's ratings. Everything is aggregated in the
+    database with three queries whose results do not grow with the number
+    of reviews.
+    """
+    now = now or timezone.now()
+    thirty_days_ago = now - timedelta(days=30)
+    sixty_days_ago = now - timedelta(days=60)
+    reviews = Review.objects.filter(user=user)
+
+    totals = reviews.aggregate(
+        count=Count('id'),
+        average=Avg('rating'),
+        stddev=StdDev('rating'),
+        recent=Avg('rating', filter=Q(created_at__gte=thirty_days_ago)),
+        previous=Avg('rating', filter=Q(created_at__gte=sixty_days_ago, created_at__lt=thirty_days_ago)),
+        **{f'stars_{stars}': Count('id', filter=_stars(stars)) for stars in range(1, 6)}
+    )
+    # Distinct ratings are few (half stars), so the percentiles are read off
+    # a histogram rather than the sorted list of every review
+    histogram = list(reviews.values_list('rating').annotate(count=Count('id')).order_by('rating'))
+    average_by_genre = {
+        row['genre__name']: round(row['average_rating'], 1)
+        for row in MovieGenre.objects.filter(movie__reviews__user=user)
+            .values('genre__name')
+            .annotate(average_rating=Avg('movie__reviews__rating'))
+    }
+
+    count = totals['count']
+    recent_avg = totals['recent'] or 0
+    previous_avg = totals['previous'] or 0
+    trend = "increasing" if recent_avg > previous_avg else "decreasing" if recent_avg < previous_avg else "stable"
+
+    return {
+        "distribution": {
+            '5_stars': totals['stars_5'],
+            '4_stars': totals['stars_4'],
+            '3_stars': totals['stars_3'],
+            '2_stars': totals['stars_2'],
+            '1_star': totals['stars_1']
+        },
+        "average_by_genre": average_by_genre,
+        "summary": {
+            "count": count,
+            "average": round(totals['average'], 2) if count else None,
+            "median": _percentile(histogram, count, 0.5) if count else None,
+            "std_dev": round(totals['stddev'], 2) if count else None,
+            "percentiles": {
+                str(percent): _percentile(histogram, count, percent / 100) if count else None
+                for percent in (25, 50, 75, 90)
+            }
+        },
+        "rating_trends": {
+            "last_30_days": round(recent_avg, 1),
+            "previous_30_days": round(previous_avg, 1),
+            "trend": trend
+        }
+    }
+
+
+def timeframe_start(timeframe, now):
+    return now - timedelta(days=TIMEFRAMES[timeframe])
+
+
+def watch_history(watches, activity, timeframe='month', now=None):
+    """
+    The timeline lists the movies from ``watches``; the summary is read
+    from the user's daily activity rollup.
+    """
+    end_date = now or timezone.now()
+    start_date = timeframe_start(timeframe, end_date)
+    first_day = timezone.localdate(start_date)
+
+    timeline = defaultdict(list)
+    for watch in watches:
+        if start_date <= watch['watched_at'] <= end_date:
+            timeline[timezone.localdate(watch['watched_at']).isoformat()].append({
+                "id": watch['movie_id'],
+                "title": watch['movie__title'],
+                "rating": watch['user_rating']
+            })
+
+    day_counts = defaultdict(int)
+    total_runtime = 0
+    watched = 0
+    for day in activity:
+        if day['date'] < first_day or not day['watches']:
+            continue
+        watched += day['watches']
+        total_runtime += day['runtime_minutes']
+        day_counts[day['date'].strftime('%A')] += day['watches']
+
+    days_in_range = (end_date - start_date).days or 1
+    most_active_day = max(day_counts.items(), key=lambda x: x[1])[0] if day_counts else None
+
+    return {
+        "timeline": [
+            {"date": date, "movies_watched": len(movies), "movies": movies}
+            for date, movies in timeline.items()
+        ],
+        "summary": {
+            "daily_average": round(watched / days_in_range, 1),
+            "most_active_day": most_active_day,
+            "total_watch_time": total_runtime
+        }
+    }
+
+
+def load_top_rated(user, limit=5):
+    return list(
+        Review.objects.filter(user=user).order_by('-rating', 'id')
+        .values('movie_id', 'rating', 'created_at', 'movie__title')[:limit]
+    )
+
+
+def load_longest_watched(user, limit=5):
+    return list(
+        Watchlist.objects.filter(user=user, movie__runtime_minutes__isnull=False)
+        .order_by('-movie__runtime_minutes', 'id')
+        .values('movie_id', 'movie__title', 'movie__runtime_minutes')[:limit]
+    )
+
+
+def longest_watched(watches, limit=5):
+    with_runtime = [watch for watch in watches if watch['movie__runtime_minutes']]
+    return sorted(with_runtime, key=lambda watch: watch['movie__runtime_minutes'], reverse=True)[:limit]
+
+
+def user_highlights(top_reviews, longest_watches, activity, now=None):
+    watch_dates = [day['date'] for day in activity if day['watches']]
+    current_streak = 0
+    longest_streak = 0
+    if watch_dates:
+        active = set(watch_dates)
+        current_date = timezone.localdate(now or timezone.now())
+        for i in range(30):  # Check last 30 days
+            if current_date - timedelta(days=i) in active:
+                current_streak += 1
+            else:
+                break
+
+        temp_streak = 0
+        sorted_dates = sorted(watch_dates)
+        for i in range(len(sorted_dates)):
+            if i > 0 and (sorted_dates[i] - sorted_dates[i-1]).days == 1:
+                temp_streak += 1
+            else:
+                temp_streak = 1
+            longest_streak = max(longest_streak, temp_streak)
+
+    return {
+        "top_rated_movies": [
+            {
+                "id": review['movie_id'],
+                "title": review['movie__title'],
+                "rating": review['rating'],
+                "review_date": review['created_at']
+            }
+            for review in top_reviews
+        ],
+        "longest_movies_watched": [
+            {
+                "id": watch['movie_id'],
+                "title": watch['movie__title'],
+                "runtime_minutes": watch['movie__runtime_minutes']
+            }
+            for watch in longest_watches
+            if watch['movie__runtime_minutes']  # Only include movies with runtime data
+        ],
+        "watching_streak": {
+            "current_streak": current_streak,
+            "longest_streak": longest_streak,
+            "total_active_days": len(watch_dates)
+        }
+    }
+
+
+def analytics_dashboard(user, sections, timeframe='month'):
+    """
+    Every requested analytics section. The watch based sections share one
+    snapshot of the user's watches and daily activity; rating figures are
+    aggregated in the database.
+
+    The result is cached per user for a short time. The key includes the
+    user's ``UserStats.updated_at``, which every watch, watch later and
+    review write bumps, so the user's own changes show up immediately.
+    """
+    stats = get_user_stats(user)
+    cache_key = 'analytics:dashboard:{}:{}:{}:{}'.format(
+        user.pk, stats.updated_at.timestamp(), ','.join(sections), timeframe)
+    data = cache.get(cache_key)
+    if data is not None:
+        return data
+
+    now = timezone.now()
+    watches = load_watched_movies(user) if set(sections) - {'statistics', 'ratings'} else []
+    activity = load_daily_activity(user) if {'watch_history', 'highlights'} & set(sections) else []
+
+    builders = {
+        'statistics': lambda: user_statistics(stats),
+        'genres': lambda: genre_analytics(watches, now),
+        'ratings': lambda: rating_analytics(user, now),
+        'watch_history': lambda: watch_history(watches, activity, timeframe, now),
+        'highlights': lambda: user_highlights(load_top_rated(user), longest_watched(watches), activity, now),
+    }
+    data = {section: builders[section]() for section in sections}
+    cache.set(cache_key, data, DASHBOARD_CACHE_TIMEOUT)
+    return data
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MovieModuleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movie_module'
+
+    def ready(self):
+        from . import signals  # noqa: F401
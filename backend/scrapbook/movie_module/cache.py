@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Movie
+from .serializers import MovieSerializer
+
+MOVIE_CACHE_ALIAS = getattr(settings, 'MOVIE_CACHE_ALIAS', 'movies')
+
+HITS_KEY = 'movie:stats:hits'
+MISSES_KEY = 'movie:stats:misses'
+
+
+def movie_cache():
+    return caches[MOVIE_CACHE_ALIAS]
+
+
+def movie_cache_key(movie_id):
+    return f'movie:detail:{movie_id}'
+
+
+def _count(key):
+    cache = movie_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First event since the cache was (re)started; counters never expire
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_movie_payload(movie_id):
+    """
+    Read-through lookup of a serialized movie. Returns None when the movie
+    does not exist; misses for unknown ids are not cached.
+    """
+    cache = movie_cache()
+    payload = cache.get(movie_cache_key(movie_id))
+    if payload is not None:
+        _count(HITS_KEY)
+        return payload
+
+    _count(MISSES_KEY)
+    movie = Movie.objects.filter(id=movie_id).first()
+    if movie is None:
+        return None
+    payload = dict(MovieSerializer(movie).data)
+    # TTL comes from the cache's TIMEOUT setting
+    cache.set(movie_cache_key(movie_id), payload)
+    return payload
+
+
+def invalidate_movies(movie_ids):
+    movie_cache().delete_many([movie_cache_key(movie_id) for movie_id in movie_ids])
+
+
+def cache_stats():
+    cache = movie_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 1) if total else 0
+    }
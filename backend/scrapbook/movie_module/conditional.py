@@ -0,0 +1,46 @@
+from django.db.models import Count, Max
+from django.utils.dateparse import parse_datetime
+
+from .cache import movie_cache, movie_cache_key
+from .models import Movie, Review, WatchLater, Watchlist
+
+# Validators for django.views.decorators.http.condition. Each one costs at
+# most a single indexed aggregate query and never serializes the response.
+
+
+def aggregate_etag(queryset, timestamp_field, *parts, movie_changes=False):
+    # Count catches removals, the newest timestamp catches additions and edits.
+    # Lists embedding movie summaries also change when any of those movies do.
+    aggregates = {'count': Count('pk'), 'latest': Max(timestamp_field)}
+    if movie_changes:
+        aggregates['movie_latest'] = Max('movie__updated_at')
+    stats = queryset.aggregate(**aggregates)
+    timestamps = [stats[key].timestamp() if stats[key] else 0
+                  for key in ('latest', 'movie_latest') if key in stats]
+    return '-'.join(str(part) for part in (*parts, stats['count'], *timestamps))
+
+
+def expands_movie(request):
+    return 'movie' in request.GET.get('expand', '').split(',')
+
+
+def movie_last_modified(request, movie_id):
+    payload = movie_cache().get(movie_cache_key(movie_id))
+    if payload is not None:
+        return parse_datetime(payload['updated_at'])
+    return Movie.objects.filter(id=movie_id).values_list('updated_at', flat=True).first()
+
+
+def movie_reviews_etag(request, movie_id):
+    return aggregate_etag(Review.objects.filter(movie_id=movie_id), 'updated_at', 'reviews', movie_id)
+
+
+def watchlist_etag(request):
+    # The user id keeps one account's validators from matching another's
+    return aggregate_etag(Watchlist.objects.filter(user=request.user), 'watched_at',
+                          'watchlist', request.user.pk, movie_changes=expands_movie(request))
+
+
+def watch_later_etag(request):
+    return aggregate_etag(WatchLater.objects.filter(user=request.user), 'added_at',
+                          'watch-later', request.user.pk, movie_changes=expands_movie(request))
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import invalidate_movies
+from .models import Movie, Review, WatchLater, Watchlist
+
+COUNTER_FIELDS = ['review_count', 'review_rating_sum', 'watch_count', 'watch_later_count']
+
+REPAIR_BATCH_SIZE = 1000
+
+
+def adjust_movie_counters(movie_id, **deltas):
+    """
+    Apply ``deltas`` to the community counters of one movie with a single
+    ``UPDATE ... SET field = field + delta``, safe under concurrent writers.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    Movie.objects.filter(pk=movie_id).update(updated_at=timezone.now(), **changes)
+    # Drop the cached payload only once the new counts are visible to readers
+    transaction.on_commit(lambda: invalidate_movies([movie_id]))
+
+
+def adjust_counters_for_movies(movie_ids, **deltas):
+    """Apply the same ``deltas`` to many movies with one UPDATE."""
+    movie_ids = list(movie_ids)
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not movie_ids or not changes:
+        return
+    Movie.objects.filter(pk__in=movie_ids).update(updated_at=timezone.now(), **changes)
+    transaction.on_commit(lambda: invalidate_movies(movie_ids))
+
+
+def _subquery(queryset, aggregate, output_field=None):
+    value = queryset.filter(movie=OuterRef('pk')).values('movie').annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(value, output_field=output_field), Value(0), output_field=output_field)
+
+
+def refresh_review_counters(movie_id):
+    """
+    Recompute one movie's review aggregates from the Review table in a
+    single UPDATE, for writes that do not know the previous rating.
+    """
+    Movie.objects.filter(pk=movie_id).update(
+        updated_at=timezone.now(),
+        review_count=_subquery(Review.objects, Count('id')),
+        review_rating_sum=_subquery(Review.objects, Sum('rating'), FloatField()),
+    )
+    transaction.on_commit(lambda: invalidate_movies([movie_id]))
+
+
+def recount_movie_counters(movie_ids=None):
+    """
+    Recompute every counter from the source tables and fix the movies
+    that drifted. Returns the number of movies updated.
+    """
+    computed = {
+        'review_count': _subquery(Review.objects, Count('id')),
+        'review_rating_sum': _subquery(Review.objects, Sum('rating'), FloatField()),
+        'watch_count': _subquery(Watchlist.objects, Count('id')),
+        'watch_later_count': _subquery(WatchLater.objects, Count('id')),
+    }
+    movies = Movie.objects.all()
+    if movie_ids is not None:
+        movies = movies.filter(pk__in=movie_ids)
+
+    stale = list(
+        movies.annotate(**{f'actual_{field}': expression for field, expression in computed.items()})
+        .exclude(**{field: F(f'actual_{field}') for field in COUNTER_FIELDS})
+        .values_list('pk', flat=True)
+    )
+    for start in range(0, len(stale), REPAIR_BATCH_SIZE):
+        batch = stale[start:start + REPAIR_BATCH_SIZE]
+        with transaction.atomic():
+            Movie.objects.filter(pk__in=batch).update(updated_at=timezone.now(), **computed)
+            transaction.on_commit(lambda batch=batch: invalidate_movies(batch))
+    return len(stale)
@@ -0,0 +1,106 @@
+import base64
+import heapq
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Review, Watchlist
+
+# Tie-break order between activity types at the same timestamp (highest first)
+ACTIVITY_TYPES = {'review': 1, 'watch': 0}
+
+
+def encode_cursor(activity):
+    payload = json.dumps([activity['action_date'].isoformat(), activity['type'], activity['id']])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        action_date, kind, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        action_date = parse_datetime(action_date)
+        if action_date is None or kind not in ACTIVITY_TYPES:
+            raise ValueError(cursor)
+        return action_date, kind, int(pk)
+    except Exception:
+        raise ValidationError({'before': 'Invalid cursor'})
+
+
+def _before(date_field, kind, cursor):
+    # Rows of ``kind`` that sort after the cursor position in the merged feed
+    action_date, cursor_kind, pk = cursor
+    if ACTIVITY_TYPES[kind] < ACTIVITY_TYPES[cursor_kind]:
+        return Q(**{f'{date_field}__lte': action_date})
+    if ACTIVITY_TYPES[kind] > ACTIVITY_TYPES[cursor_kind]:
+        return Q(**{f'{date_field}__lt': action_date})
+    return Q(**{f'{date_field}__lt': action_date}) | Q(**{date_field: action_date, 'id__lt': pk})
+
+
+def _reviews(user, cursor, limit):
+    reviews = Review.objects.filter(user=user)
+    if cursor:
+        reviews = reviews.filter(_before('created_at', 'review', cursor))
+    for review in reviews.order_by('-created_at', '-id').values(
+            'id', 'created_at', 'rating', 'review_text',
+            'movie_id', 'movie__title', 'movie__image_url')[:limit]:
+        yield {
+            "id": review['id'],
+            "type": "review",
+            "movie": {
+                "id": review['movie_id'],
+                "title": review['movie__title'],
+                "image_url": review['movie__image_url']
+            },
+            "action_date": review['created_at'],
+            "details": {
+                "rating": review['rating'],
+                "review_snippet": review['review_text'][:100] if review['review_text'] else None
+            }
+        }
+
+
+def _watches(user, cursor, limit):
+    watches = Watchlist.objects.filter(user=user)
+    if cursor:
+        watches = watches.filter(_before('watched_at', 'watch', cursor))
+    for watch in watches.order_by('-watched_at', '-id').values(
+            'id', 'watched_at', 'movie_id', 'movie__title', 'movie__image_url')[:limit]:
+        yield {
+            "id": watch['id'],
+            "type": "watch",
+            "movie": {
+                "id": watch['movie_id'],
+                "title": watch['movie__title'],
+                "image_url": watch['movie__image_url']
+            },
+            "action_date": watch['watched_at'],
+            "details": {}
+        }
+
+
+def activity_feed(user, limit, before=None, types=None):
+    """
+    One page of the user's reviews and watches, newest first.
+
+    Each type is read with its own ``(user, date, id)`` index-ordered query
+    limited to the page size, and the two streams are merged, so a page
+    costs the same however much history the user has. Returns the page
+    and the cursor for the next one (or None).
+    """
+    cursor = decode_cursor(before) if before else None
+    types = types or list(ACTIVITY_TYPES)
+    streams = []
+    if 'review' in types:
+        streams.append(_reviews(user, cursor, limit + 1))
+    if 'watch' in types:
+        streams.append(_watches(user, cursor, limit + 1))
+
+    merged = heapq.merge(
+        *streams, reverse=True,
+        key=lambda activity: (activity['action_date'], ACTIVITY_TYPES[activity['type']], activity['id'])
+    )
+    page = [activity for _, activity in zip(range(limit + 1), merged)]
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
@@ -0,0 +1,70 @@
+from django.db.models import CharField, Count, Exists, F, OuterRef, Value
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from .models import MovieGenre
+
+
+def _parse(request, name, convert):
+    raw = request.GET.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return convert(raw)
+    except ValueError:
+        raise ValidationError({name: f'Invalid value: {raw}'})
+
+
+def _parse_bool(raw):
+    value = raw.lower()
+    if value in ('true', '1'):
+        return True
+    if value in ('false', '0'):
+        return False
+    raise ValueError(raw)
+
+
+def filter_movies(queryset, request):
+    """
+    Apply the catalog filter parameters:
+    ``genre`` (comma separated, all must match), ``year_min``, ``year_max``,
+    ``language``, ``min_rating``, ``min_votes`` and ``is_adult``.
+    """
+    genres = [g.strip() for g in request.GET.get('genre', '').split(',') if g.strip()]
+    for genre in genres:
+        queryset = queryset.filter(Exists(
+            MovieGenre.objects.filter(movie=OuterRef('pk'), genre__name=genre)
+        ))
+
+    filters = {
+        'start_year__gte': _parse(request, 'year_min', int),
+        'start_year__lte': _parse(request, 'year_max', int),
+        'language': _parse(request, 'language', str),
+        'rating__gte': _parse(request, 'min_rating', float),
+        'num_votes__gte': _parse(request, 'min_votes', int),
+        'is_adult': _parse(request, 'is_adult', _parse_bool),
+    }
+    return queryset.filter(**{lookup: value for lookup, value in filters.items() if value is not None})
+
+
+def movie_facets(queryset):
+    """
+    Genre and decade counts for ``queryset``, computed with one
+    ``UNION ALL`` aggregate query.
+    """
+    genre_counts = MovieGenre.objects.filter(movie__in=queryset.values('pk')) \
+        .values(key=F('genre__name')) \
+        .annotate(count=Count('id'), kind=Value('genre', output_field=CharField())) \
+        .values_list('kind', 'key', 'count')
+    decade_counts = queryset.exclude(start_year=None) \
+        .values(key=Cast(F('start_year') / 10 * 10, CharField())) \
+        .annotate(count=Count('id'), kind=Value('decade', output_field=CharField())) \
+        .values_list('kind', 'key', 'count')
+
+    facets = {'genres': {}, 'decades': {}}
+    for kind, key, count in genre_counts.union(decade_counts, all=True):
+        if kind == 'genre':
+            facets['genres'][key] = count
+        else:
+            facets['decades'][f'{key}s'] = count
+    return facets
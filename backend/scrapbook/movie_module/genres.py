@@ -0,0 +1,51 @@
+import json
+
+from django.db import transaction
+
+from .models import Genre, MovieGenre
+
+
+def normalize_genres(genres):
+    """
+    Coerce the loosely typed ``genres`` payloads we receive (list, JSON
+    encoded string, bare string, ...) into a de-duplicated list of names.
+    """
+    if genres is None:
+        return []
+    if isinstance(genres, str):
+        try:
+            genres = json.loads(genres)
+        except json.JSONDecodeError:
+            genres = [genres]
+    if not isinstance(genres, list):
+        genres = [genres]
+
+    names = []
+    for genre in genres:
+        name = str(genre).strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def sync_movie_genres(movies):
+    """
+    Rewrite the MovieGenre rows of ``movies`` from their ``genres`` field
+    using a fixed number of bulk queries, however many movies are passed.
+    """
+    movies = list(movies)
+    if not movies:
+        return
+    movie_genres = {movie.pk: normalize_genres(movie.genres) for movie in movies}
+    names = {name for genres in movie_genres.values() for name in genres}
+
+    with transaction.atomic():
+        if names:
+            Genre.objects.bulk_create([Genre(name=name) for name in names], ignore_conflicts=True)
+        genre_ids = dict(Genre.objects.filter(name__in=names).values_list('name', 'id'))
+        MovieGenre.objects.filter(movie_id__in=movie_genres.keys()).delete()
+        MovieGenre.objects.bulk_create([
+            MovieGenre(movie_id=movie_id, genre_id=genre_ids[name])
+            for movie_id, genres in movie_genres.items()
+            for name in genres
+        ])
@@ -0,0 +1,266 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from .ingest import upsert_movies
+from .models import Movie
+from .serializers import MovieIngestSerializer
+
+try:
+    import httpx
+except ImportError:  # The IMDb gateway endpoints report themselves unavailable
+    httpx = None
+
+IMDB_CACHE_ALIAS = getattr(settings, 'IMDB_CACHE_ALIAS', 'imdb')
+SEARCH_CACHE_TIMEOUT = getattr(settings, 'IMDB_SEARCH_CACHE_TIMEOUT', 60 * 60 * 24)
+TITLE_CACHE_TIMEOUT = getattr(settings, 'IMDB_TITLE_CACHE_TIMEOUT', 60 * 60 * 24 * 7)
+NOT_FOUND_CACHE_TIMEOUT = 60 * 60
+# Longest a request queues for a rate limiter token before giving up
+MAX_RATE_LIMIT_WAIT = 2.0
+MAX_SEARCH_ROWS = 50
+TITLE_ID = re.compile(r'tt\d{1,12}')
+
+# RapidAPI field names of the Movie columns
+MOVIE_FIELDS = {
+    'id': 'id',
+    'title': 'primaryTitle',
+    'original_title': 'originalTitle',
+    'description': 'description',
+    'image_url': 'primaryImage',
+    'release_date': 'releaseDate',
+    'start_year': 'startYear',
+    'end_year': 'endYear',
+    'runtime_minutes': 'runtimeMinutes',
+    'genres': 'genres',
+    'countries': 'countriesOfOrigin',
+    'rating': 'averageRating',
+    'num_votes': 'numVotes',
+    'budget': 'budget',
+    'gross_worldwide': 'grossWorldwide',
+    'is_adult': 'isAdult',
+}
+
+
+def _cache_get(key):
+    return caches[IMDB_CACHE_ALIAS].get(key)
+
+
+def _cache_set(key, value, timeout):
+    caches[IMDB_CACHE_ALIAS].set(key, value, timeout)
+
+
+class ImdbUnavailable(Exception):
+    """The upstream API could not answer; ``retry_after`` is set when rate limited."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    ``rate`` requests per second with bursts of up to ``capacity``. Only
+    used from the gateway's event loop, so it needs no locking.
+    """
+
+    def __init__(self, rate, capacity, clock):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    async def acquire(self, max_wait=MAX_RATE_LIMIT_WAIT):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+        if wait > max_wait:
+            raise ImdbUnavailable('IMDb API rate limit reached', retry_after=wait)
+        # Reserve the token now so later callers queue behind this one
+        self.tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class ImdbGateway:
+    """
+    Fetches RapidAPI IMDb responses through a persistent cache.
+
+    Requests run on a private event loop thread that owns one pooled async
+    HTTP client and the rate limiter. Concurrent misses for the same
+    request share a single upstream call.
+    """
+
+    def __init__(self, base_url, api_key, host, rate, burst, timeout=10.0, max_connections=10):
+        if httpx is None:
+            raise ImproperlyConfigured("The IMDb gateway requires httpx")
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'x-rapidapi-key': api_key or '', 'x-rapidapi-host': host}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.rate, self.burst = rate, burst
+        self.inflight = {}
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='imdb-gateway', daemon=True)
+        self.thread.start()
+        self.client = self.limiter = None
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    async def _start(self):
+        # The client and limiter belong to the loop they run on
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url, headers=self.headers, timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+        )
+        self.limiter = TokenBucket(self.rate, self.burst, self.loop.time)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def cache_key(self, path, params):
+        request = json.dumps([self.base_url, path, sorted(params.items())])
+        return f'imdb:{hashlib.sha256(request.encode()).hexdigest()}'
+
+    def get(self, path, params, timeout):
+        """
+        ``(status, body, fetched)`` for a GET of ``path``, where ``fetched``
+        is true for the one caller whose request went upstream. Successful
+        and not found responses are cached for ``timeout`` seconds.
+        """
+        key = self.cache_key(path, params)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached[0], cached[1], False
+        future = asyncio.run_coroutine_threadsafe(self._get(key, path, params, timeout), self.loop)
+        try:
+            return future.result(self.timeout + MAX_RATE_LIMIT_WAIT + 1)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise ImdbUnavailable('IMDb API request timed out')
+
+    async def _get(self, key, path, params, timeout):
+        task = self.inflight.get(key)
+        fetched = task is None
+        if fetched:
+            task = self.inflight[key] = self.loop.create_task(self._fetch(key, path, params, timeout))
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        status, body = await asyncio.shield(task)
+        return status, body, fetched
+
+    async def _fetch(self, key, path, params, timeout):
+        # Cache reads and writes are disk I/O, so they run off the loop thread.
+        # A request that finished after our caller checked may have filled it
+        cached = await self.loop.run_in_executor(None, _cache_get, key)
+        if cached is not None:
+            return cached
+
+        await self.limiter.acquire()
+        try:
+            response = await self.client.get(path, params=params)
+        except httpx.HTTPError as e:
+            raise ImdbUnavailable(f'IMDb API request failed: {e}')
+        if response.status_code == 429:
+            retry_after = response.headers.get('Retry-After', '')
+            raise ImdbUnavailable('IMDb API quota exceeded',
+                                  retry_after=float(retry_after) if retry_after.isdigit() else None)
+        if response.status_code == 404:
+            result = (404, None)
+            await self.loop.run_in_executor(None, _cache_set, key, result, NOT_FOUND_CACHE_TIMEOUT)
+            return result
+        if response.status_code != 200:
+            raise ImdbUnavailable(f'IMDb API responded with {response.status_code}')
+        result = (200, response.json())
+        await self.loop.run_in_executor(None, _cache_set, key, result, timeout)
+        return result
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide gateway, configured from the ``IMDB_API_*`` settings."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = ImdbGateway(
+                base_url=getattr(settings, 'IMDB_API_BASE_URL', 'https://imdb236.p.rapidapi.com/imdb'),
+                api_key=getattr(settings, 'IMDB_API_KEY', None),
+                host=getattr(settings, 'IMDB_API_HOST', 'imdb236.p.rapidapi.com'),
+                rate=getattr(settings, 'IMDB_API_RATE_LIMIT', 5),
+                burst=getattr(settings, 'IMDB_API_BURST', 10),
+                timeout=getattr(settings, 'IMDB_API_TIMEOUT', 10.0),
+                max_connections=getattr(settings, 'IMDB_API_MAX_CONNECTIONS', 10),
+            )
+        return _gateway
+
+
+def movie_data(title):
+    """Movie column values for a RapidAPI title object."""
+    data = {field: title.get(source) for field, source in MOVIE_FIELDS.items()}
+    data['language'] = (title.get('spokenLanguages') or [None])[0]
+    data['genres'] = data['genres'] or []
+    data['countries'] = data['countries'] or []
+    data['is_adult'] = bool(data['is_adult'])
+    return data
+
+
+def supplied_data(title):
+    """The Movie column values a RapidAPI title object actually carries."""
+    data = {field: title[source] for field, source in MOVIE_FIELDS.items() if title.get(source) is not None}
+    if title.get('spokenLanguages'):
+        data['language'] = title['spokenLanguages'][0]
+    return data
+
+
+def store_titles(titles):
+    """
+    Write fetched titles through to the Movie table, skipping any that do
+    not validate. Search results are sparse, so stored movies only get
+    the columns the payload supplies.
+    """
+    ids = [title['id'] for title in titles if isinstance(title.get('id'), str)]
+    existing = set(Movie.objects.filter(id__in=ids).values_list('id', flat=True))
+    valid = {}
+    for title in titles:
+        serializer = MovieIngestSerializer(data=supplied_data(title), partial=title.get('id') in existing)
+        if serializer.is_valid() and 'id' in serializer.validated_data:
+            valid[serializer.validated_data['id']] = serializer.validated_data
+    upsert_movies(valid, existing)
+
+
+def search_titles(query, page=1, rows=24):
+    """Movie data of the RapidAPI title search results for ``query``."""
+    status, body, fetched = get_gateway().get('/search', {
+        'type': 'movie',
+        'primaryTitleAutocomplete': query,
+        'rows': min(rows, MAX_SEARCH_ROWS),
+        'page': page,
+    }, SEARCH_CACHE_TIMEOUT)
+    titles = [title for title in body.get('results', []) if title.get('id')] if status == 200 else []
+    if fetched:
+        store_titles(titles)
+    return [movie_data(title) for title in titles]
+
+
+def get_title(movie_id):
+    """Movie data of one RapidAPI title, or None if IMDb does not know it."""
+    if not TITLE_ID.fullmatch(movie_id):
+        return None
+    status, body, fetched = get_gateway().get(f'/{movie_id}', {}, TITLE_CACHE_TIMEOUT)
+    if status != 200:
+        return None
+    if fetched:
+        store_titles([body])
+    return movie_data(body)
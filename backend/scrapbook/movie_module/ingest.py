@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .cache import invalidate_movies
+from .genres import sync_movie_genres
+from .models import Movie
+from .search import INDEXED_FIELDS, index_movies
+
+UPSERT_BATCH_SIZE = 200
+
+
+def upsert_movies(validated, existing=frozenset()):
+    """
+    Write ``{movie_id: column values}`` to the Movie table, creating new
+    movies and updating stored ones. Each movie only overwrites the
+    columns it supplies, so partial payloads keep the rest; ``existing``
+    names the stored movies, whose genres are only rewritten when supplied.
+
+    bulk_create sends no post_save, so the genre rows, search index and
+    cached payloads are refreshed here.
+    """
+    if not validated:
+        return
+    # One upsert per distinct set of supplied fields
+    groups = defaultdict(list)
+    for data in validated.values():
+        groups[frozenset(data) - {'id'}].append(Movie(**data))
+
+    with transaction.atomic():
+        for update_fields, movies in groups.items():
+            if update_fields:
+                # bulk_create stamps updated_at (auto_now) on every row it writes
+                Movie.objects.bulk_create(
+                    movies, batch_size=UPSERT_BATCH_SIZE, update_conflicts=True,
+                    unique_fields=['id'], update_fields=sorted(update_fields | {'updated_at'})
+                )
+            else:
+                Movie.objects.bulk_create(movies, batch_size=UPSERT_BATCH_SIZE, ignore_conflicts=True)
+
+        sync_movie_genres(movie for movies in groups.values() for movie in movies
+                          if movie.pk not in existing or 'genres' in validated[movie.pk])
+        # Re-read the text columns so partial updates are indexed with their stored values
+        index_movies(Movie.objects.filter(id__in=validated.keys()).only('id', *INDEXED_FIELDS))
+        invalidate_movies(validated.keys())
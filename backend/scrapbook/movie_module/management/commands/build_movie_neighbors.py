@@ -0,0 +1,24 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from movie_module.recommendations import DEFAULT_NEIGHBORS, build_movie_neighbors
+
+
+class Command(BaseCommand):
+    help = "Precompute the top-k item-item neighbors used by users/recommendations/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbors', type=int, default=DEFAULT_NEIGHBORS,
+                            help=f"Neighbors kept per movie (default: {DEFAULT_NEIGHBORS})")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            written = build_movie_neighbors(options['neighbors'])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {written} movie neighbors in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from movie_module.similarity import DESCRIPTION_DIMENSIONS, SIMILARITY_DIR, build_similarity_index
+
+
+class Command(BaseCommand):
+    help = "Build the content-based feature matrix used by movies/<id>/similar/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default=SIMILARITY_DIR,
+                            help=f"Output directory (default: {SIMILARITY_DIR})")
+        parser.add_argument('--dimensions', type=int, default=DESCRIPTION_DIMENSIONS,
+                            help="SVD dimensions kept from the description TF-IDF")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            count = build_similarity_index(options['directory'], options['dimensions'])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} movies in {time.monotonic() - started:.1f}s"
+        ))
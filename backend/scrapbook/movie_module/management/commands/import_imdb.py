@@ -0,0 +1,150 @@
+import csv
+import gzip
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movie_module.ingest import upsert_movies
+
+
+def tconst_key(tconst):
+    # IMDb ids sort numerically (tt9999999 < tt10000000), and so do the dumps
+    return (len(tconst), tconst)
+
+
+def open_tsv(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    handle = opener(path, 'rt', encoding='utf-8', newline='')
+    # The dumps do not quote fields; titles may contain stray quote characters
+    return handle, csv.DictReader(handle, delimiter='\t', quoting=csv.QUOTE_NONE)
+
+
+def nullable(value, convert=str):
+    return None if value in ('\\N', '') else convert(value)
+
+
+def iter_ratings(path):
+    handle, reader = open_tsv(path)
+    with handle:
+        for row in reader:
+            yield row['tconst'], float(row['averageRating']), int(row['numVotes'])
+
+
+def join_ratings(titles, ratings):
+    """
+    Merge-join two tconst-ordered streams, yielding ``(row, rating, votes)``
+    with only one pending rating held in memory at a time.
+    """
+    pending = next(ratings, None)
+    for row in titles:
+        key = tconst_key(row['tconst'])
+        while pending is not None and tconst_key(pending[0]) < key:
+            pending = next(ratings, None)
+        if pending is not None and pending[0] == row['tconst']:
+            yield row, pending[1], pending[2]
+        else:
+            yield row, None, None
+
+
+class Command(BaseCommand):
+    help = "Import movies from the IMDb title.basics / title.ratings TSV dumps"
+
+    def add_arguments(self, parser):
+        parser.add_argument('basics', help="Path to title.basics.tsv(.gz)")
+        parser.add_argument('--ratings', help="Path to title.ratings.tsv(.gz)")
+        parser.add_argument('--title-types', default='movie',
+                            help="Comma separated titleType values to import (default: movie)")
+        parser.add_argument('--min-votes', type=int, default=0,
+                            help="Skip titles with fewer votes than this")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--checkpoint',
+                            help="Checkpoint file (default: <basics>.checkpoint.json)")
+        parser.add_argument('--resume', action='store_true',
+                            help="Skip titles up to the last committed checkpoint")
+
+    def handle(self, *args, **options):
+        basics = options['basics']
+        if not os.path.exists(basics):
+            raise CommandError(f"File not found: {basics}")
+        if options['ratings'] and not os.path.exists(options['ratings']):
+            raise CommandError(f"File not found: {options['ratings']}")
+
+        title_types = {t.strip() for t in options['title_types'].split(',') if t.strip()}
+        min_votes = options['min_votes']
+        batch_size = options['batch_size']
+        checkpoint_path = options['checkpoint'] or f"{basics}.checkpoint.json"
+
+        resume_after = None
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                resume_after = json.load(f)['last_tconst']
+            self.stdout.write(f"Resuming after {resume_after}")
+
+        self.with_ratings = bool(options['ratings'])
+        handle, titles = open_tsv(basics)
+        ratings = iter_ratings(options['ratings']) if options['ratings'] else iter(())
+
+        self.started = time.monotonic()
+        self.read = self.written = 0
+        previous_key = None
+        batch = []
+        with handle:
+            for row, rating, votes in join_ratings(titles, ratings):
+                self.read += 1
+                tconst = row['tconst']
+                key = tconst_key(tconst)
+                if previous_key is not None and key <= previous_key:
+                    raise CommandError(f"{basics} is not sorted by tconst (at {tconst})")
+                previous_key = key
+
+                if resume_after is not None and key <= tconst_key(resume_after):
+                    continue
+                if row['titleType'] not in title_types:
+                    continue
+                if min_votes and (votes or 0) < min_votes:
+                    continue
+
+                batch.append(self.build_movie(row, rating, votes))
+                if len(batch) >= batch_size:
+                    self.flush(batch, checkpoint_path)
+                    batch = []
+
+        if batch:
+            self.flush(batch, checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.written} movies from {self.read} rows "
+            f"in {time.monotonic() - self.started:.1f}s"
+        ))
+
+    def build_movie(self, row, rating, votes):
+        # Columns written by the importer; everything else on Movie is left alone
+        movie = {
+            'id': row['tconst'],
+            'title': row['primaryTitle'],
+            'original_title': nullable(row['originalTitle']),
+            'is_adult': row['isAdult'] == '1',
+            'start_year': nullable(row['startYear'], int),
+            'end_year': nullable(row['endYear'], int),
+            'runtime_minutes': nullable(row['runtimeMinutes'], int),
+            'genres': nullable(row['genres'], lambda value: value.split(',')) or [],
+        }
+        # Ratings are only written when a ratings file is given
+        if self.with_ratings:
+            movie.update(rating=rating, num_votes=votes)
+        return movie
+
+    def flush(self, movies, checkpoint_path):
+        upsert_movies({movie['id']: movie for movie in movies})
+
+        # Only checkpoint once the batch is committed
+        with open(checkpoint_path, 'w') as f:
+            json.dump({'last_tconst': movies[-1]['id']}, f)
+
+        self.written += len(movies)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f"{self.read} rows read, {self.written} movies written "
+            f"({self.read / elapsed:.0f} rows/s), last {movies[-1]['id']}"
+        )
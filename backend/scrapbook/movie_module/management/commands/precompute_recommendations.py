@@ -0,0 +1,113 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from movie_module import recommendations
+from movie_module.recommendations import (export_neighbor_arrays, load_user_movies,
+                                          store_recommendations, users_to_refresh)
+from movie_module.scoring import load_neighbor_arrays, score_users
+
+DEFAULT_CHECKPOINT = os.path.join(settings.BASE_DIR, 'var', 'precompute_recommendations.json')
+
+
+class Command(BaseCommand):
+    help = "Precompute every user's recommendations into the UserRecommendation table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help="Only users whose reviews or watchlist changed since the last completed run")
+        parser.add_argument('--resume', action='store_true',
+                            help="Continue an interrupted run from its checkpoint")
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                            help=f"Checkpoint file (default: {DEFAULT_CHECKPOINT})")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=500, help="Users per worker task")
+        parser.add_argument('--limit', type=int, default=50, help="Recommendations stored per user")
+
+    def handle(self, *args, **options):
+        if recommendations.np is None:
+            raise CommandError("precompute_recommendations requires numpy and scipy")
+        self.checkpoint_path = options['checkpoint']
+        self.state = self.read_state()
+
+        run = self.state.get('running')
+        if run and not options['resume']:
+            self.stdout.write("Discarding the checkpoint of an interrupted run (use --resume to continue it)")
+        if not (run and options['resume']):
+            since = None
+            if options['incremental']:
+                since = self.state.get('last_completed')
+                if since is None:
+                    self.stdout.write("No completed run yet, computing every user")
+            run = {'started_at': timezone.now().isoformat(), 'since': since, 'after_user': None}
+        self.write_state(running=run)
+
+        since = parse_datetime(run['since']) if run['since'] else None
+        user_ids = users_to_refresh(since, run['after_user'])
+        self.stdout.write(f"Scoring {len(user_ids)} users with {options['workers']} workers")
+
+        started = time.monotonic()
+        with tempfile.TemporaryDirectory() as shared:
+            movie_ids = export_neighbor_arrays(shared)
+            self.score(run, user_ids, movie_ids, shared, options)
+
+        self.state.pop('running', None)
+        self.write_state(last_completed=run['started_at'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Precomputed recommendations for {len(user_ids)} users in {time.monotonic() - started:.1f}s"
+        ))
+
+    def score(self, run, user_ids, movie_ids, shared, options):
+        rows = {movie_id: row for row, movie_id in enumerate(movie_ids)}
+        chunks = iter([user_ids[i:i + options['chunk_size']]
+                       for i in range(0, len(user_ids), options['chunk_size'])])
+        done = 0
+        # Spawned workers only import movie_module.scoring; they never touch the database
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(options['workers'], mp_context=context,
+                                 initializer=load_neighbor_arrays, initargs=(shared,)) as pool:
+            pending = deque()
+
+            def submit():
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    payload = load_user_movies(chunk, rows)
+                    pending.append((chunk, pool.submit(score_users, payload, options['limit'])))
+
+            for _ in range(options['workers'] * 2):
+                submit()
+            # Chunks are stored in submission order so the checkpoint only
+            # ever covers users whose results are committed
+            while pending:
+                chunk, future = pending.popleft()
+                store_recommendations(chunk, [
+                    (user_id, [(movie_ids[row], score) for row, score in ranked])
+                    for user_id, ranked in future.result()
+                ])
+                run['after_user'] = chunk[-1]
+                self.write_state(running=run)
+                done += len(chunk)
+                self.stdout.write(f"{done}/{len(user_ids)} users, last {chunk[-1]}")
+                submit()
+
+    def read_state(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def write_state(self, **changes):
+        self.state.update(changes)
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+        with open(f'{self.checkpoint_path}.tmp', 'w') as f:
+            json.dump(self.state, f)
+        os.replace(f'{self.checkpoint_path}.tmp', self.checkpoint_path)
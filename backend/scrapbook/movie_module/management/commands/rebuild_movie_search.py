@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from movie_module.search import fts_enabled, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text movie search index from the Movie table"
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            raise CommandError("The full-text search index is only available on SQLite")
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} movies"))
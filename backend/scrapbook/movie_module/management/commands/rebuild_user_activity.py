@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from movie_module.user_activity import rebuild_user_activity
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user daily activity rollup from reviews and watchlist"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help="Only rebuild these users")
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or list(
+            get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+        )
+        rebuild_user_activity(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt daily activity for {len(user_ids)} users"))
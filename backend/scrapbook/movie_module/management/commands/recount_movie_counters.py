@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from movie_module.counters import recount_movie_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-movie review, watch and watch later counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('movie_ids', nargs='*', help="Only check these movies")
+
+    def handle(self, *args, **options):
+        repaired = recount_movie_counters(options['movie_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"Repaired counters on {repaired} movies"))
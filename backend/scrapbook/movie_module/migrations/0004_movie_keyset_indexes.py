@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0003_watchlist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['rating', 'id'], name='movie_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['num_votes', 'id'], name='movie_num_votes_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0004_movie_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MovieGenre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movie_genres', to='movie_module.genre')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movie_genres', to='movie_module.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['genre', 'movie'], name='moviegenre_genre_movie_idx')],
+                'unique_together': {('movie', 'genre')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+from movie_module.genres import normalize_genres
+
+
+def populate_movie_genres(apps, schema_editor):
+    Movie = apps.get_model('movie_module', 'Movie')
+    Genre = apps.get_model('movie_module', 'Genre')
+    MovieGenre = apps.get_model('movie_module', 'MovieGenre')
+
+    movie_genres = {
+        movie_id: normalize_genres(genres)
+        for movie_id, genres in Movie.objects.values_list('id', 'genres').iterator()
+    }
+    names = {name for genres in movie_genres.values() for name in genres}
+    Genre.objects.bulk_create([Genre(name=name) for name in names], ignore_conflicts=True)
+    genre_ids = dict(Genre.objects.values_list('name', 'id'))
+
+    MovieGenre.objects.bulk_create(
+        [
+            MovieGenre(movie_id=movie_id, genre_id=genre_ids[name])
+            for movie_id, genres in movie_genres.items()
+            for name in genres
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def clear_movie_genres(apps, schema_editor):
+    apps.get_model('movie_module', 'MovieGenre').objects.all().delete()
+    apps.get_model('movie_module', 'Genre').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0005_genre_moviegenre'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_movie_genres, clear_movie_genres),
+    ]
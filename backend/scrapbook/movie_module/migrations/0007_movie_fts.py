@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite specific; other databases fall back to icontains search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS movie_module_movie_fts USING fts5(
+            movie_id, title, original_title, description,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO movie_module_movie_fts(movie_id, title, original_title, description)
+        SELECT id, title, original_title, description FROM movie_module_movie
+        """
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS movie_module_movie_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0006_populate_movie_genres'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:00
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Movie = apps.get_model('movie_module', 'Movie')
+    Review = apps.get_model('movie_module', 'Review')
+    Watchlist = apps.get_model('movie_module', 'Watchlist')
+    WatchLater = apps.get_model('movie_module', 'WatchLater')
+
+    def subquery(model, aggregate, output_field=None):
+        value = model.objects.filter(movie=OuterRef('pk')).values('movie') \
+            .annotate(value=aggregate).values('value')
+        return Coalesce(Subquery(value, output_field=output_field), Value(0), output_field=output_field)
+
+    Movie.objects.update(
+        review_count=subquery(Review, Count('id')),
+        review_rating_sum=subquery(Review, Sum('rating'), FloatField()),
+        watch_count=subquery(Watchlist, Count('id')),
+        watch_later_count=subquery(WatchLater, Count('id')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0008_movie_review_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='review_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='review_rating_sum',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='watch_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='watch_later_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0009_movie_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['start_year', 'id'], name='movie_start_year_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_adult', 'rating', 'id'], name='movie_adult_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_adult', 'num_votes', 'id'], name='movie_adult_votes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['language', 'rating'], name='movie_language_rating_idx'),
+        ),
+    ]
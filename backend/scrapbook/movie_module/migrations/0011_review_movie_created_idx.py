@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0010_movie_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['movie', 'created_at', 'id'], name='review_movie_created_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:04
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_user_stats(apps, schema_editor):
+    # Every user with history gets a row, so later writes apply their deltas
+    # to real totals (see movie_module.user_stats.rebuild_user_stats)
+    UserStats = apps.get_model('movie_module', 'UserStats')
+    MovieGenre = apps.get_model('movie_module', 'MovieGenre')
+    Review = apps.get_model('movie_module', 'Review')
+    WatchLater = apps.get_model('movie_module', 'WatchLater')
+    Watchlist = apps.get_model('movie_module', 'Watchlist')
+
+    stats = {}
+
+    def row(user_id):
+        return stats.setdefault(user_id, UserStats(user_id=user_id, genre_counts={}))
+
+    for item in Watchlist.objects.values('user_id').annotate(count=Count('id')):
+        row(item['user_id']).watched_count = item['count']
+    for item in WatchLater.objects.values('user_id').annotate(count=Count('id')):
+        row(item['user_id']).watch_later_count = item['count']
+    for item in Review.objects.values('user_id').annotate(count=Count('id'), total=Sum('rating')):
+        row(item['user_id']).review_count = item['count']
+        row(item['user_id']).rating_sum = item['total'] or 0
+
+    genre_counts = defaultdict(dict)
+    for user_id, genre, count in MovieGenre.objects \
+            .values_list('movie__watchlist__user_id', 'genre__name') \
+            .filter(movie__watchlist__user_id__isnull=False).annotate(count=Count('id')):
+        genre_counts[user_id][genre] = count
+    for user_id, counts in genre_counts.items():
+        row(user_id).genre_counts = counts
+    UserStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('movie_module', '0011_review_movie_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('watched_count', models.IntegerField(default=0)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('watch_later_count', models.IntegerField(default=0)),
+                ('genre_counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_daily_activity(apps, schema_editor):
+    UserDailyActivity = apps.get_model('movie_module', 'UserDailyActivity')
+    Review = apps.get_model('movie_module', 'Review')
+    Watchlist = apps.get_model('movie_module', 'Watchlist')
+
+    days = {}
+    for row in Watchlist.objects.values('user_id', date=TruncDate('watched_at')) \
+            .annotate(count=Count('id'), runtime=Sum('movie__runtime_minutes')):
+        days[row['user_id'], row['date']] = UserDailyActivity(
+            user_id=row['user_id'], date=row['date'],
+            watches=row['count'], runtime_minutes=row['runtime'] or 0,
+        )
+    for row in Review.objects.values('user_id', date=TruncDate('created_at')) \
+            .annotate(count=Count('id'), total=Sum('rating')):
+        activity = days.setdefault((row['user_id'], row['date']),
+                                   UserDailyActivity(user_id=row['user_id'], date=row['date']))
+        activity.reviews = row['count']
+        activity.rating_sum = row['total'] or 0
+    UserDailyActivity.objects.bulk_create(days.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0012_userstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('watches', models.IntegerField(default=0)),
+                ('reviews', models.IntegerField(default=0)),
+                ('runtime_minutes', models.IntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_daily_activity, migrations.RunPython.noop),
+    ]
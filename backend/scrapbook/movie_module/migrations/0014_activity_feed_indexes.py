@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0013_userdailyactivity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='review_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='watchlist',
+            index=models.Index(fields=['user', 'watched_at', 'id'], name='watchlist_user_watched_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_module', '0014_activity_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='movie_module.movie')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movie_module.movie')),
+            ],
+            options={
+                'unique_together': {('movie', 'neighbor')},
+            },
+        ),
+    ]
@@ -19,10 +19,69 @@ class Movie(models.Model):
     budget = models.BigIntegerField(null=True, blank=True)
     gross_worldwide = models.BigIntegerField(null=True, blank=True)
     is_adult = models.BooleanField(default=False)
+    # Community aggregates, maintained incrementally by movie_module.counters
+    review_count = models.IntegerField(default=0)
+    review_rating_sum = models.FloatField(default=0)
+    watch_count = models.IntegerField(default=0)
+    watch_later_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination orderings used by the catalog listing
+            models.Index(fields=['rating', 'id'], name='movie_rating_id_idx'),
+            models.Index(fields=['num_votes', 'id'], name='movie_num_votes_id_idx'),
+            models.Index(fields=['start_year', 'id'], name='movie_start_year_id_idx'),
+            # Catalog filters (see movie_module/filters.py)
+            models.Index(fields=['is_adult', 'rating', 'id'], name='movie_adult_rating_idx'),
+            models.Index(fields=['is_adult', 'num_votes', 'id'], name='movie_adult_votes_idx'),
+            models.Index(fields=['language', 'rating'], name='movie_language_rating_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
+    @property
+    def community_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.review_rating_sum / self.review_count, 2)
+
+
+class Genre(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+class MovieGenre(models.Model):
+    # Normalized, indexed copy of Movie.genres so genre stats can be grouped in SQL
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="movie_genres")
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name="movie_genres")
+
+    class Meta:
+        unique_together = ('movie', 'genre')
+        indexes = [
+            models.Index(fields=['genre', 'movie'], name='moviegenre_genre_movie_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.movie.title} - {self.genre.name}"
+
+
+class MovieNeighbor(models.Model):
+    # Top-k item-item cosine neighbors over the review matrix, rebuilt by
+    # manage.py build_movie_neighbors (see movie_module.recommendations)
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="neighbors")
+    neighbor = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('movie', 'neighbor')
+
+    def __str__(self):
+        return f"{self.movie_id} ~ {self.neighbor_id} ({self.score:.3f})"
+
 
 User = get_user_model()
 
@@ -32,9 +91,16 @@ class Review(models.Model):
     rating = models.FloatField()  # Rating out of 5
     review_text = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('user', 'movie')  # One review per user per movie
+        indexes = [
+            # Newest-first keyset pagination of a movie's reviews
+            models.Index(fields=['movie', 'created_at', 'id'], name='review_movie_created_idx'),
+            # Newest-first activity feed of a user
+            models.Index(fields=['user', 'created_at', 'id'], name='review_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} - {self.movie.title} ({self.rating})"
@@ -57,6 +123,52 @@ class Watchlist(models.Model):
 
     class Meta:
         unique_together = ('user', 'movie')  # Avoid duplicate entries
+        indexes = [
+            # Newest-first activity feed of a user
+            models.Index(fields=['user', 'watched_at', 'id'], name='watchlist_user_watched_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} has watched {self.movie.title}"
+
+class UserStats(models.Model):
+    # Per-user totals maintained by movie_module.user_stats. No related_name:
+    # User.delete_related_objects would treat the accessor as a manager.
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    watched_count = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+    watch_later_count = models.IntegerField(default=0)
+    genre_counts = models.JSONField(default=dict)  # {genre name: watched movies}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.user.name}"
+
+class UserDailyActivity(models.Model):
+    # Per-user, per-day rollup maintained by movie_module.user_activity
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_activity")
+    date = models.DateField()
+    watches = models.IntegerField(default=0)
+    reviews = models.IntegerField(default=0)
+    runtime_minutes = models.IntegerField(default=0)  # of the movies watched that day
+    rating_sum = models.FloatField(default=0)  # of the reviews written that day
+
+    class Meta:
+        unique_together = ('user', 'date')
+
+    def __str__(self):
+        return f"{self.user.name} on {self.date}"
+
+class UserRecommendation(models.Model):
+    # Precomputed by manage.py precompute_recommendations, served by rank
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recommendations")
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    rank = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('user', 'rank')
+
+    def __str__(self):
+        return f"{self.user.name} #{self.rank}: {self.movie_id}"
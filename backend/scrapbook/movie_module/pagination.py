@@ -0,0 +1,103 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_int_param(request, name, default, minimum=1, maximum=None):
+    """Read an integer query parameter, clamped to ``maximum``."""
+    raw = request.GET.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer'})
+    if value < minimum:
+        raise ValidationError({name: f'Must be at least {minimum}'})
+    return min(value, maximum) if maximum is not None else value
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over an ``(ordering field, primary key)`` keyset.
+
+    Each page is a single ``WHERE (field, pk) < (value, last_pk) ... LIMIT n``
+    query, so the cost of a page does not depend on how deep into the
+    table the client has scrolled. Rows with a NULL ordering value are left
+    out, as they have no position in the keyset.
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+
+    def __init__(self, ordering, default_limit=20, max_limit=100):
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+
+    def get_limit(self, request):
+        return get_int_param(request, self.limit_query_param, self.default_limit, maximum=self.max_limit)
+
+    def encode_cursor(self, value, pk):
+        payload = json.dumps([value, pk], default=str).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            meta = queryset.model._meta
+            value = meta.get_field(self.field).to_python(value)
+            pk = meta.pk.to_python(pk)
+        except Exception:
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+        return value, pk
+
+    def paginate_queryset(self, queryset, request):
+        pk_name = queryset.model._meta.pk.name
+        prefix = '-' if self.descending else ''
+        lookup = 'lt' if self.descending else 'gt'
+
+        if self.field != pk_name:
+            queryset = queryset.filter(**{f'{self.field}__isnull': False})
+            queryset = queryset.order_by(prefix + self.field, prefix + pk_name)
+        else:
+            queryset = queryset.order_by(prefix + pk_name)
+
+        cursor = request.GET.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(queryset, cursor)
+            if self.field != pk_name:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{lookup}': value}) |
+                    Q(**{self.field: value, f'{pk_name}__{lookup}': pk})
+                )
+            else:
+                queryset = queryset.filter(**{f'{pk_name}__{lookup}': pk})
+
+        limit = self.get_limit(request)
+        # Fetch one extra row to learn whether another page exists
+        page = list(queryset[:limit + 1])
+        self.request = request
+        self.next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(getattr(last, self.field), last.pk)
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        }
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import Review, UserRecommendation
+from .recommendations import LIKED_RATING, get_user_recommendations, recommend_movies, store_recommendations
+
+# Enough for the largest page the endpoint serves
+CACHED_RECOMMENDATIONS = 100
+# How long an entry is served without a refresh, and how much longer a stale
+# entry may still be served while a refresh runs in the background
+CACHE_TIMEOUT = getattr(settings, 'RECOMMENDATIONS_CACHE_TIMEOUT', 60 * 60)
+STALE_TIMEOUT = getattr(settings, 'RECOMMENDATIONS_STALE_TIMEOUT', 24 * 60 * 60)
+REFRESH_LOCK_TIMEOUT = 5 * 60
+
+
+def cache_key(user_id):
+    return f'recommendations:{user_id}'
+
+
+def _store(user_id, entry):
+    cache.set(cache_key(user_id), entry, CACHE_TIMEOUT + STALE_TIMEOUT)
+
+
+def refresh_recommendations(user_id):
+    """
+    Recompute and cache ``user_id``'s recommendations. After a taste change
+    they are scored from the live reviews and written back to the
+    precomputed table; otherwise the precomputed rows are re-read.
+    """
+    started = time.time()
+    entry = cache.get(cache_key(user_id))
+    changed = entry is not None and entry['changed_at'] is not None
+    if changed:
+        results = recommend_movies(user_id, CACHED_RECOMMENDATIONS)
+        store_recommendations([user_id], [(user_id, results)])
+    else:
+        results = get_user_recommendations(user_id, CACHED_RECOMMENDATIONS)
+    liked = set(Review.objects.filter(user_id=user_id, rating__gt=LIKED_RATING)
+                .values_list('movie_id', flat=True))
+
+    # A taste change that landed while we were computing keeps the entry stale
+    current = cache.get(cache_key(user_id))
+    changed_at = current and current['changed_at']
+    if changed_at is not None and changed_at < started:
+        changed_at = None
+    fresh_until = 0 if changed_at else time.time() + CACHE_TIMEOUT
+    _store(user_id, {'results': results, 'liked': liked, 'fresh_until': fresh_until,
+                     'changed_at': changed_at})
+    return results
+
+
+def _refresh_in_background(user_id):
+    try:
+        refresh_recommendations(user_id)
+    finally:
+        cache.delete(f'{cache_key(user_id)}:refreshing')
+        connection.close()
+
+
+def schedule_refresh(user_id):
+    # Only one refresh per user at a time, across processes sharing the cache
+    if cache.add(f'{cache_key(user_id)}:refreshing', 1, REFRESH_LOCK_TIMEOUT):
+        threading.Thread(target=_refresh_in_background, args=(user_id,), daemon=True).start()
+
+
+def get_cached_recommendations(user, limit=20):
+    """
+    ``[(movie_id, score), ...]`` from the per-user cache. A stale entry is
+    served as is while it is refreshed in the background; only a user
+    with nothing cached waits for the computation.
+    """
+    entry = cache.get(cache_key(user.pk))
+    if entry is None or entry['results'] is None:
+        return refresh_recommendations(user.pk)[:limit]
+    if entry['fresh_until'] < time.time():
+        schedule_refresh(user.pk)
+    return entry['results'][:limit]
+
+
+def _update_entry(user_id, update, missing=None):
+    def apply():
+        entry = cache.get(cache_key(user_id))
+        if entry is not None:
+            update(entry)
+        elif missing is not None:
+            entry = missing
+        else:
+            return
+        _store(user_id, entry)
+    transaction.on_commit(apply)
+
+
+def _drop_movies(entry, movie_ids):
+    if entry['results'] is not None:
+        entry['results'] = [row for row in entry['results'] if row[0] not in movie_ids]
+
+
+def record_review_taste(user, movie_id, rating):
+    """
+    Hook for review writes; ``rating`` is None for a deleted review. Only a
+    rating that crosses the liked threshold invalidates the cached
+    recommendations, other reviews just drop the movie from them.
+    """
+    liked = rating is not None and rating > LIKED_RATING
+
+    def update(entry):
+        if liked != (movie_id in entry['liked']):
+            entry['changed_at'] = time.time()
+            entry['fresh_until'] = 0
+        if rating is not None:
+            _drop_movies(entry, {movie_id})
+    # With nothing cached to compare against, score from live data next time
+    _update_entry(user.pk, update, missing={
+        'results': None, 'liked': set(), 'fresh_until': 0, 'changed_at': time.time()})
+    if rating is not None:
+        # Reviewed movies also leave the precomputed rows a refresh re-reads
+        UserRecommendation.objects.filter(user=user, movie_id=movie_id).delete()
+
+
+def exclude_recommendations(user, movie_ids):
+    """Hook for watchlist additions: watched movies leave the user's recommendations."""
+    if not movie_ids:
+        return
+    movie_ids = set(movie_ids)
+    UserRecommendation.objects.filter(user=user, movie_id__in=movie_ids).delete()
+    _update_entry(user.pk, lambda entry: _drop_movies(entry, movie_ids))
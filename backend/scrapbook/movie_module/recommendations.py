@@ -0,0 +1,190 @@
+import os
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import MovieNeighbor, Review, UserRecommendation, UserStats, Watchlist
+from .scoring import rank_candidates
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # Only the offline build and precompute jobs need these
+    np = sparse = None
+
+LIKED_RATING = 3.5
+DEFAULT_NEIGHBORS = 50
+BLOCK_SIZE = 2000
+INSERT_BATCH_SIZE = 5000
+
+
+def load_rating_matrix():
+    """
+    The review table as a sparse users x movies CSR matrix of ratings,
+    with the movie id of every column.
+    """
+    users, movies = {}, {}
+    rows, columns, ratings = array('i'), array('i'), array('f')
+    for user_id, movie_id, rating in Review.objects.values_list('user_id', 'movie_id', 'rating') \
+            .iterator(chunk_size=10000):
+        rows.append(users.setdefault(user_id, len(users)))
+        columns.append(movies.setdefault(movie_id, len(movies)))
+        ratings.append(rating)
+
+    matrix = sparse.csr_matrix(
+        (np.frombuffer(ratings, dtype=np.float32),
+         (np.frombuffer(rows, dtype=np.int32), np.frombuffer(columns, dtype=np.int32))),
+        shape=(len(users), len(movies)),
+    )
+    return matrix, list(movies)
+
+
+def item_neighbors(matrix, k=DEFAULT_NEIGHBORS):
+    """
+    Yield ``(column, neighbor columns, scores)`` with the ``k`` most cosine
+    similar movies of every movie column in ``matrix``.
+
+    Similarities are computed a block of movies at a time so only
+    ``BLOCK_SIZE`` rows of the movie x movie product exist at once.
+    """
+    items = matrix.T.tocsr()
+    norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    items = sparse.diags(1 / norms).dot(items).tocsr()
+    items_t = items.T.tocsr()
+
+    for start in range(0, items.shape[0], BLOCK_SIZE):
+        block = items[start:start + BLOCK_SIZE].dot(items_t).tocsr()
+        for offset in range(block.shape[0]):
+            column = start + offset
+            lo, hi = block.indptr[offset], block.indptr[offset + 1]
+            neighbors, scores = block.indices[lo:hi], block.data[lo:hi]
+            keep = (neighbors != column) & (scores > 0)
+            neighbors, scores = neighbors[keep], scores[keep]
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                neighbors, scores = neighbors[top], scores[top]
+            if len(scores):
+                yield column, neighbors, scores
+
+
+def build_movie_neighbors(k=DEFAULT_NEIGHBORS):
+    """Replace the MovieNeighbor table with fresh top-``k`` neighbors. Returns the row count."""
+    if np is None:
+        raise ImproperlyConfigured("Building movie neighbors requires numpy and scipy")
+    matrix, movie_ids = load_rating_matrix()
+    written = 0
+    with transaction.atomic():
+        MovieNeighbor.objects.all().delete()
+        batch = []
+        for column, neighbors, scores in item_neighbors(matrix, k):
+            batch.extend(
+                MovieNeighbor(movie_id=movie_ids[column], neighbor_id=movie_ids[neighbor], score=float(score))
+                for neighbor, score in zip(neighbors, scores)
+            )
+            if len(batch) >= INSERT_BATCH_SIZE:
+                MovieNeighbor.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        MovieNeighbor.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def recommend_movies(user, limit=20):
+    """
+    ``[(movie_id, score), ...]`` for movies similar to the ones ``user``
+    rated above 3.5, best first. Movies the user has reviewed or watched are
+    left out. Three indexed queries against the precomputed neighbor table.
+    """
+    ratings = dict(Review.objects.filter(user=user).values_list('movie_id', 'rating'))
+    liked = {movie_id: rating for movie_id, rating in ratings.items() if rating > LIKED_RATING}
+    if not liked:
+        return []
+    seen = set(ratings) | set(Watchlist.objects.filter(user=user).values_list('movie_id', flat=True))
+
+    rows = MovieNeighbor.objects.filter(movie_id__in=liked).values_list('movie_id', 'neighbor_id', 'score')
+    return rank_candidates(liked, seen, rows, limit)
+
+
+def get_user_recommendations(user, limit=20):
+    """
+    The user's precomputed recommendations (one indexed read), falling
+    back to scoring them now for users the last precompute run missed.
+    """
+    precomputed = list(UserRecommendation.objects.filter(user=user).order_by('rank')
+                       .values_list('movie_id', 'score')[:limit])
+    return precomputed or recommend_movies(user, limit)
+
+
+def export_neighbor_arrays(directory):
+    """
+    Write the neighbor table as CSR ``.npy`` arrays (see scoring.NEIGHBOR_ARRAYS)
+    for worker processes to memory-map. Returns the movie id of every row;
+    ids are sorted so row order breaks ties the same way movie ids do.
+    """
+    movie_ids = sorted(set(MovieNeighbor.objects.values_list('movie_id', flat=True)) |
+                       set(MovieNeighbor.objects.values_list('neighbor_id', flat=True)))
+    rows = {movie_id: row for row, movie_id in enumerate(movie_ids)}
+    counts = np.zeros(len(movie_ids) + 1, dtype=np.int64)
+    indices, scores = array('i'), array('f')
+    for movie_id, neighbor_id, score in MovieNeighbor.objects.order_by('movie_id', 'neighbor_id') \
+            .values_list('movie_id', 'neighbor_id', 'score').iterator(chunk_size=10000):
+        counts[rows[movie_id] + 1] += 1
+        indices.append(rows[neighbor_id])
+        scores.append(score)
+
+    np.save(os.path.join(directory, 'indptr.npy'), np.cumsum(counts))
+    np.save(os.path.join(directory, 'indices.npy'), np.frombuffer(indices, dtype=np.int32))
+    np.save(os.path.join(directory, 'scores.npy'), np.frombuffer(scores, dtype=np.float32))
+    return movie_ids
+
+
+def users_to_refresh(since=None, after=None):
+    """
+    Ids of the users to precompute, in order: everyone, or with ``since``
+    only users whose reviews, watchlist or totals changed after it.
+    """
+    users = get_user_model().objects.order_by('pk')
+    if after is not None:
+        users = users.filter(pk__gt=after)
+    if since is not None:
+        changed = (
+            Exists(Review.objects.filter(user=OuterRef('pk'), updated_at__gte=since)) |
+            Exists(Watchlist.objects.filter(user=OuterRef('pk'), watched_at__gte=since)) |
+            # Bumped by deletions too, which leave no timestamp behind
+            Exists(UserStats.objects.filter(user=OuterRef('pk'), updated_at__gte=since))
+        )
+        users = users.filter(changed)
+    return list(users.values_list('pk', flat=True))
+
+
+def load_user_movies(user_ids, rows):
+    """``[(user_id, {row: rating}, seen rows), ...]`` for scoring.score_users."""
+    liked = {user_id: {} for user_id in user_ids}
+    seen = {user_id: set() for user_id in user_ids}
+    for user_id, movie_id, rating in Review.objects.filter(user_id__in=user_ids) \
+            .values_list('user_id', 'movie_id', 'rating'):
+        row = rows.get(movie_id)
+        if row is not None:
+            seen[user_id].add(row)
+            if rating > LIKED_RATING:
+                liked[user_id][row] = rating
+    for user_id, movie_id in Watchlist.objects.filter(user_id__in=user_ids).values_list('user_id', 'movie_id'):
+        if movie_id in rows:
+            seen[user_id].add(rows[movie_id])
+    return [(user_id, liked[user_id], seen[user_id]) for user_id in user_ids]
+
+
+def store_recommendations(user_ids, results):
+    """Replace the stored recommendations of ``user_ids`` with ``[(user_id, [(movie_id, score), ...]), ...]``."""
+    with transaction.atomic():
+        UserRecommendation.objects.filter(user_id__in=user_ids).delete()
+        UserRecommendation.objects.bulk_create(
+            UserRecommendation(user_id=user_id, movie_id=movie_id, score=score, rank=rank)
+            for user_id, ranked in results
+            for rank, (movie_id, score) in enumerate(ranked, 1)
+        )
@@ -0,0 +1,31 @@
+from django.utils import timezone
+
+from .models import Review
+
+
+def upsert_review(user, movie_id, rating, review_text=None, update_text=True):
+    """
+    Create or update ``user``'s review of ``movie_id`` with one
+    ``INSERT ... ON CONFLICT (user, movie) DO UPDATE ... RETURNING`` statement.
+
+    Returns ``(review, created)``. A missing movie surfaces as an
+    IntegrityError from the foreign key, raised at commit time on SQLite
+    where the constraint is deferred.
+    """
+    table = Review._meta.db_table
+    now = timezone.now()
+    updates = ['rating = excluded.rating', 'updated_at = excluded.updated_at']
+    if update_text:
+        updates.append('review_text = excluded.review_text')
+
+    review = list(Review.objects.raw(
+        f'INSERT INTO {table} (user_id, movie_id, rating, review_text, created_at, updated_at) '
+        f'VALUES (%s, %s, %s, %s, %s, %s) '
+        f'ON CONFLICT (user_id, movie_id) DO UPDATE SET {", ".join(updates)} '
+        f'RETURNING id, user_id, movie_id, rating, review_text, created_at, updated_at',
+        [user.pk, movie_id, rating, review_text, now, now],
+    ))[0]
+    # Only a fresh insert carries our timestamp in created_at
+    created = review.created_at == now
+    review.user = user
+    return review, created
@@ -0,0 +1,49 @@
+# Recommendation scoring shared by the API and the precompute_recommendations
+# worker processes. Kept free of Django imports so spawned workers can load
+# it without setting up the app registry.
+import heapq
+import os
+from collections import defaultdict
+
+NEIGHBOR_ARRAYS = ('indptr', 'indices', 'scores')
+
+
+def rank_candidates(liked, seen, neighbor_rows, limit):
+    """
+    Sum ``similarity x rating`` over ``(movie, neighbor, similarity)`` rows
+    for neighbors not in ``seen`` and return the best ``limit`` as
+    ``[(neighbor, score), ...]``.
+    """
+    scores = defaultdict(float)
+    for movie, neighbor, similarity in neighbor_rows:
+        if neighbor not in seen:
+            scores[neighbor] += similarity * liked[movie]
+    return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+
+_neighbors = {}
+
+
+def load_neighbor_arrays(directory):
+    """Process pool initializer: memory-map the shared CSR neighbor arrays read-only."""
+    import numpy as np
+    for name in NEIGHBOR_ARRAYS:
+        _neighbors[name] = np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+
+def score_users(users, limit):
+    """
+    Score ``[(user_id, {movie: rating}, seen movies), ...]`` against the
+    mapped neighbor arrays. Movies are row numbers of those arrays.
+    """
+    indptr, indices, scores = (_neighbors[name] for name in NEIGHBOR_ARRAYS)
+    results = []
+    for user_id, liked, seen in users:
+        rows = (
+            (movie, neighbor, similarity)
+            for movie in liked
+            for neighbor, similarity in zip(indices[indptr[movie]:indptr[movie + 1]].tolist(),
+                                            scores[indptr[movie]:indptr[movie + 1]].tolist())
+        )
+        results.append((user_id, rank_candidates(liked, seen, rows, limit)))
+    return results
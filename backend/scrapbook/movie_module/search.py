@@ -0,0 +1,92 @@
+import re
+
+from django.db import connection
+
+from .models import Movie
+
+FTS_TABLE = 'movie_module_movie_fts'
+INDEXED_FIELDS = ['title', 'original_title', 'description']
+TEXT_COLUMNS = '{' + ' '.join(INDEXED_FIELDS) + '}'
+
+# Keeps FTS5 boolean expressions well under its parser depth limit
+DELETE_BATCH_SIZE = 100
+
+# bm25 weights in column order: movie_id, title, original_title, description
+RANK_EXPRESSION = f'bm25({FTS_TABLE}, 0.0, 10.0, 5.0, 1.0)'
+
+
+def fts_enabled():
+    # The FTS5 index only exists on SQLite (see migration 0007)
+    return connection.vendor == 'sqlite'
+
+
+def quote_term(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match_query(query):
+    """
+    Turn free text into a safe FTS5 expression: every word becomes a quoted
+    prefix term on the text columns and all of them must match.
+    """
+    terms = re.findall(r'\w+', query.lower())
+    return ' '.join(f'{TEXT_COLUMNS}: {quote_term(term)}*' for term in terms)
+
+
+def search_movie_ids(query, limit, offset=0):
+    """Return the ids of movies matching ``query``, best match first."""
+    if not fts_enabled():
+        # Unranked fallback for databases without the FTS5 index
+        return list(
+            Movie.objects.filter(title__icontains=query)
+            .order_by('-num_votes', 'id')
+            .values_list('id', flat=True)[offset:offset + limit]
+        )
+
+    match = build_match_query(query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT movie_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY {RANK_EXPRESSION} LIMIT %s OFFSET %s',
+            [match, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def unindex_movies(movie_ids):
+    movie_ids = list(movie_ids)
+    if not movie_ids or not fts_enabled():
+        return
+    # movie_id is an indexed FTS column, so this is an index lookup, not a scan
+    with connection.cursor() as cursor:
+        for start in range(0, len(movie_ids), DELETE_BATCH_SIZE):
+            batch = movie_ids[start:start + DELETE_BATCH_SIZE]
+            match = '{movie_id}: (' + ' OR '.join(quote_term(movie_id) for movie_id in batch) + ')'
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+
+
+def index_movies(movies):
+    """Insert or refresh the search rows of ``movies``."""
+    movies = list(movies)
+    if not movies or not fts_enabled():
+        return
+    unindex_movies(movie.pk for movie in movies)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE}(movie_id, title, original_title, description) '
+            f'VALUES (%s, %s, %s, %s)',
+            [(movie.pk, movie.title, movie.original_title, movie.description) for movie in movies],
+        )
+
+
+def rebuild_search_index():
+    """Repopulate the FTS5 table from scratch, returning the number of rows indexed."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(movie_id, title, original_title, description) '
+            f'SELECT id, title, original_title, description FROM {Movie._meta.db_table}'
+        )
+        return cursor.rowcount
@@ -1,60 +1,91 @@
 from rest_framework import serializers
 from .models import Movie, Review, WatchLater, Watchlist
-import json
+from .genres import normalize_genres, sync_movie_genres
 
-class MovieSerializer(serializers.ModelSerializer):
-    genres = serializers.SerializerMethodField()
+class SparseFieldsMixin:
+    # Accepts a `fields` kwarg restricting the serialized output to those names
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class GenresField(serializers.JSONField):
+    # Always render genres as a list, whatever shape (or null) was stored
+    def get_attribute(self, instance):
+        return normalize_genres(super().get_attribute(instance))
+
+class MovieSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    genres = GenresField(required=False, allow_null=True)
+    community_rating = serializers.ReadOnlyField()
     
     class Meta:
         model = Movie
         fields = '__all__'
-    
-    def get_genres(self, obj):
-        if obj.genres is None:
-            return []
-        
-        # If genres is already a list, return it
-        if isinstance(obj.genres, list):
-            return obj.genres
-        
-        # If genres is a string, try to parse it as JSON
-        if isinstance(obj.genres, str):
-            try:
-                return json.loads(obj.genres)
-            except json.JSONDecodeError:
-                return [obj.genres]
-        
-        # If genres is something else, convert to string and return as list
-        return [str(obj.genres)]
+        read_only_fields = ['review_count', 'review_rating_sum', 'watch_count', 'watch_later_count']
     
     def to_internal_value(self, data):
         # Ensure genres is a list before saving
         if 'genres' in data:
-            genres = data['genres']
-            if isinstance(genres, str):
-                try:
-                    data['genres'] = json.loads(genres)
-                except json.JSONDecodeError:
-                    data['genres'] = [genres]
-            elif not isinstance(genres, list):
-                data['genres'] = [str(genres)]
+            data['genres'] = normalize_genres(data['genres'])
         return super().to_internal_value(data)
 
-class ReviewSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        movie = super().create(validated_data)
+        sync_movie_genres([movie])
+        return movie
+
+    def update(self, instance, validated_data):
+        movie = super().update(instance, validated_data)
+        if 'genres' in validated_data:
+            sync_movie_genres([movie])
+        return movie
+
+class MovieIngestSerializer(MovieSerializer):
+    # Plain id field: bulk upserts must accept ids that already exist, and
+    # validation must not run a uniqueness query per item
+    id = serializers.CharField(max_length=20)
+
+class MovieListSerializer(serializers.ModelSerializer):
+    community_rating = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Movie
+        fields = ['id', 'title', 'image_url', 'rating', 'community_rating', 'review_count']
+
+class MovieSummarySerializer(serializers.ModelSerializer):
+    genres = GenresField(read_only=True)
+
+    class Meta:
+        model = Movie
+        fields = ['id', 'title', 'image_url', 'runtime_minutes', 'genres']
+
+class ExpandableMovieMixin:
+    # Accepts `expand_movie=True` to embed a movie summary instead of its id
+    def __init__(self, *args, **kwargs):
+        expand_movie = kwargs.pop('expand_movie', False)
+        super().__init__(*args, **kwargs)
+        if expand_movie:
+            self.fields['movie'] = MovieSummarySerializer(read_only=True)
+
+class ReviewSerializer(ExpandableMovieMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField()
     
     class Meta:
         model = Review
         fields = ['id', 'user', 'movie', 'rating', 'review_text', 'created_at']
+        # The movie comes from the URL, never from the request body
+        read_only_fields = ['movie']
 
-class WatchLaterSerializer(serializers.ModelSerializer):
+class WatchLaterSerializer(ExpandableMovieMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField()
 
     class Meta:
         model = WatchLater
         fields = ['id', 'user', 'movie', 'added_at']
 
-class WatchlistSerializer(serializers.ModelSerializer):
+class WatchlistSerializer(ExpandableMovieMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField()
 
     class Meta:
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_movies
+from .models import Movie
+from .search import INDEXED_FIELDS, index_movies, unindex_movies
+
+
+@receiver(post_save, sender=Movie)
+def reindex_movie(sender, instance, update_fields=None, **kwargs):
+    # Covers every save path, the admin and shell included; bulk writes
+    # do not send post_save and index their rows themselves
+    if update_fields is None or set(update_fields) & set(INDEXED_FIELDS):
+        index_movies([instance])
+
+
+@receiver(post_delete, sender=Movie)
+def remove_movie_from_search(sender, instance, **kwargs):
+    unindex_movies([instance.pk])
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def invalidate_movie_cache(sender, instance, **kwargs):
+    invalidate_movies([instance.pk])
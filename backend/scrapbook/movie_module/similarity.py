@@ -0,0 +1,288 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .genres import normalize_genres
+from .models import Movie
+
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.sparse.linalg import svds
+except ImportError:  # The similar movies endpoint reports itself unavailable
+    np = sparse = svds = None
+
+SIMILARITY_DIR = getattr(settings, 'MOVIE_SIMILARITY_DIR',
+                         os.path.join(settings.BASE_DIR, 'var', 'similarity'))
+FEATURES_FILE = 'features.npy'
+IDS_FILE = 'ids.npy'
+MODEL_FILE = 'model.npz'
+VOCABULARY_FILE = 'vocabulary.json'
+
+MOVIE_FIELDS = ['id', 'genres', 'start_year', 'language', 'countries', 'description']
+DESCRIPTION_DIMENSIONS = 64
+MAX_TERMS = 20000
+MIN_TERM_MOVIES = 2
+MAX_CATEGORIES = 200
+# Relative weight of each feature block in the cosine similarity
+BLOCK_WEIGHTS = {'genres': 1.0, 'decades': 0.5, 'languages': 0.5, 'countries': 0.5, 'description': 1.0}
+CATEGORICAL_BLOCKS = ['genres', 'decades', 'languages', 'countries']
+BATCH_ROWS = 65536
+
+STOPWORDS = frozenset("""
+    a about after all also an and any are as at be been before being but by can
+    for from had has have he her his how in into is it its more most not of on
+    one or out over she so than that the their them then there these they this
+    to two up was were when where which while who will with would you your
+""".split())
+
+
+def tokenize(text):
+    return [word for word in re.findall(r"[a-z]{3,}", (text or '').lower()) if word not in STOPWORDS]
+
+
+def categories(movie):
+    """The categorical feature values of a movie row, per block."""
+    year = movie['start_year']
+    return {
+        'genres': normalize_genres(movie['genres']),
+        'decades': [str(year // 10 * 10)] if year else [],
+        'languages': [movie['language']] if movie['language'] else [],
+        'countries': normalize_genres(movie['countries']),
+    }
+
+
+class MovieFeaturizer:
+    """
+    Turns movie metadata into unit-length float32 feature rows: multi-hot
+    genres and countries, one-hot decade and language, and the TF-IDF of
+    the description projected onto a truncated SVD basis.
+    """
+
+    def __init__(self, vocabulary, idf, components):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.components = components
+        self.columns = {}
+        self.blocks = {}
+        for block in CATEGORICAL_BLOCKS:
+            start = len(self.columns)
+            for value in vocabulary[block]:
+                self.columns[block, value] = len(self.columns)
+            self.blocks[block] = (start, len(self.columns))
+        self.terms = {term: i for i, term in enumerate(vocabulary['terms'])}
+
+    @property
+    def dimensions(self):
+        return len(self.columns) + self.components.shape[0]
+
+    def encode(self, movies):
+        """Sparse categorical and term-count matrices for an iterable of movie rows."""
+        cat_rows, cat_columns, term_rows, term_columns = [], [], [], []
+        count = 0
+        for row, movie in enumerate(movies):
+            count += 1
+            for block, values in categories(movie).items():
+                for value in values:
+                    column = self.columns.get((block, value))
+                    if column is not None:
+                        cat_rows.append(row)
+                        cat_columns.append(column)
+            for term in tokenize(movie['description']):
+                column = self.terms.get(term)
+                if column is not None:
+                    term_rows.append(row)
+                    term_columns.append(column)
+
+        categorical = sparse.csr_matrix(
+            (np.ones(len(cat_rows), dtype=np.float32), (cat_rows, cat_columns)),
+            shape=(count, len(self.columns)))
+        # Duplicate (row, term) entries are summed into term counts
+        term_counts = sparse.csr_matrix(
+            (np.ones(len(term_rows), dtype=np.float32), (term_rows, term_columns)),
+            shape=(count, len(self.terms)))
+        return categorical, term_counts
+
+    def tfidf(self, term_counts):
+        weighted = term_counts.multiply(self.idf.reshape(1, -1)).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).dot(weighted).tocsr()
+
+    def combine(self, categorical, term_counts):
+        """Dense, weighted, L2-normalised feature rows."""
+        features = np.zeros((categorical.shape[0], self.dimensions), dtype=np.float32)
+        features[:, :len(self.columns)] = categorical.toarray()
+        if self.components.shape[0]:
+            features[:, len(self.columns):] = self.tfidf(term_counts).dot(self.components.T)
+
+        spans = dict(self.blocks, description=(len(self.columns), self.dimensions))
+        for block, (start, end) in spans.items():
+            part = features[:, start:end]
+            norms = np.linalg.norm(part, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            features[:, start:end] = part / norms * BLOCK_WEIGHTS[block]
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return features / norms
+
+    def transform(self, movies):
+        return self.combine(*self.encode(movies))
+
+    def save(self, directory):
+        with open(os.path.join(directory, f'{VOCABULARY_FILE}.tmp'), 'w') as f:
+            json.dump(self.vocabulary, f)
+        with open(os.path.join(directory, f'{MODEL_FILE}.tmp'), 'wb') as f:
+            np.savez(f, idf=self.idf, components=self.components)
+        for name in (VOCABULARY_FILE, MODEL_FILE):
+            os.replace(os.path.join(directory, f'{name}.tmp'), os.path.join(directory, name))
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, VOCABULARY_FILE)) as f:
+            vocabulary = json.load(f)
+        with np.load(os.path.join(directory, MODEL_FILE)) as model:
+            return cls(vocabulary, model['idf'], model['components'])
+
+
+def fit_vocabulary(movies):
+    """First pass: the categorical values and description terms worth a column."""
+    counts = {block: Counter() for block in CATEGORICAL_BLOCKS}
+    term_movies = Counter()
+    total = 0
+    for movie in movies:
+        total += 1
+        for block, values in categories(movie).items():
+            counts[block].update(values)
+        term_movies.update(set(tokenize(movie['description'])))
+
+    vocabulary = {
+        block: sorted(value for value, _ in counter.most_common(MAX_CATEGORIES))
+        for block, counter in counts.items()
+    }
+    # Terms in at least two descriptions but not in half of them
+    frequent = [(term, count) for term, count in term_movies.items()
+                if MIN_TERM_MOVIES <= count <= max(total // 2, MIN_TERM_MOVIES)]
+    frequent.sort(key=lambda item: (-item[1], item[0]))
+    vocabulary['terms'] = [term for term, _ in frequent[:MAX_TERMS]]
+    idf = np.array([np.log((1 + total) / (1 + count)) + 1 for _, count in frequent[:MAX_TERMS]],
+                   dtype=np.float32)
+    return vocabulary, idf
+
+
+def _movie_rows():
+    return Movie.objects.order_by('id').values(*MOVIE_FIELDS).iterator(chunk_size=5000)
+
+
+def build_similarity_index(directory=SIMILARITY_DIR, dimensions=DESCRIPTION_DIMENSIONS):
+    """
+    Featurize every movie and write the float32 feature matrix, the movie
+    id of every row and the fitted featurizer to ``directory``. Returns the
+    number of movies indexed.
+    """
+    if np is None:
+        raise ImproperlyConfigured("The movie similarity index requires numpy and scipy")
+    os.makedirs(directory, exist_ok=True)
+
+    vocabulary, idf = fit_vocabulary(_movie_rows())
+    featurizer = MovieFeaturizer(vocabulary, idf, np.zeros((0, len(idf)), dtype=np.float32))
+    ids = []
+
+    def rows():
+        for movie in _movie_rows():
+            ids.append(movie['id'])
+            yield movie
+
+    categorical, term_counts = featurizer.encode(rows())
+    tfidf = featurizer.tfidf(term_counts)
+    rank = min(dimensions, min(tfidf.shape) - 1)
+    if rank > 0 and tfidf.nnz:
+        _, _, components = svds(tfidf, k=rank)
+        featurizer.components = components.astype(np.float32)
+
+    # Written under temporary names and swapped in, features last: servers
+    # reload when the features file changes, so they never keep a mix
+    features = np.lib.format.open_memmap(
+        os.path.join(directory, f'{FEATURES_FILE}.tmp'), mode='w+',
+        dtype=np.float32, shape=(len(ids), featurizer.dimensions))
+    for start in range(0, len(ids), BATCH_ROWS):
+        end = start + BATCH_ROWS
+        features[start:end] = featurizer.combine(categorical[start:end], term_counts[start:end])
+    features.flush()
+    del features
+
+    featurizer.save(directory)
+    with open(os.path.join(directory, f'{IDS_FILE}.tmp'), 'wb') as f:
+        np.save(f, np.array(ids, dtype=str))
+    os.replace(os.path.join(directory, f'{IDS_FILE}.tmp'), os.path.join(directory, IDS_FILE))
+    os.replace(os.path.join(directory, f'{FEATURES_FILE}.tmp'), os.path.join(directory, FEATURES_FILE))
+    return len(ids)
+
+
+class SimilarityIndex:
+    def __init__(self, directory):
+        self.features = np.load(os.path.join(directory, FEATURES_FILE), mmap_mode='r')
+        self.ids = np.load(os.path.join(directory, IDS_FILE)).tolist()
+        self.rows = {movie_id: row for row, movie_id in enumerate(self.ids)}
+        self.featurizer = MovieFeaturizer.load(directory)
+
+    def vector(self, movie):
+        """The indexed row of ``movie``, or its features computed on the fly for newer titles."""
+        row = self.rows.get(movie['id'])
+        if row is not None:
+            return np.asarray(self.features[row])
+        return self.featurizer.transform([movie])[0]
+
+    def nearest(self, vector, limit, exclude=None):
+        """``[(movie_id, score), ...]`` of the rows most similar to ``vector``, best first."""
+        candidates = []
+        for start in range(0, len(self.ids), BATCH_ROWS):
+            scores = self.features[start:start + BATCH_ROWS].dot(vector)
+            take = min(limit + 1, len(scores))
+            top = np.argpartition(-scores, take - 1)[:take]
+            candidates.extend(zip(scores[top].tolist(), (top + start).tolist()))
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        results = [(self.ids[row], score) for score, row in candidates if self.ids[row] != exclude and score > 0]
+        return results[:limit]
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index(directory=None):
+    """
+    The process-wide memory-mapped index, or None if it has not been built
+    (or numpy is missing). A rebuilt index is picked up on the next call.
+    """
+    global _index, _index_mtime
+    if np is None:
+        return None
+    directory = directory or SIMILARITY_DIR
+    try:
+        mtime = os.stat(os.path.join(directory, FEATURES_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            _index, _index_mtime = SimilarityIndex(directory), mtime
+        return _index
+
+
+def similar_movies(movie_id, limit=20):
+    """
+    ``[(movie_id, score), ...]`` for the movies whose metadata is most
+    similar to ``movie_id``'s. Returns None when the index is unavailable;
+    raises Movie.DoesNotExist for unknown ids.
+    """
+    index = get_similarity_index()
+    if index is None:
+        return None
+    movie = Movie.objects.values(*MOVIE_FIELDS).get(id=movie_id)
+    return index.nearest(index.vector(movie), limit, exclude=movie_id)
@@ -1,3 +1,1176 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from .genres import sync_movie_genres
+from .models import (Movie, MovieGenre, MovieNeighbor, Review, UserDailyActivity, UserRecommendation, UserStats,
+                     WatchLater, Watchlist)
+from . import imdb, recommendation_cache, similarity, views
+from .cache import cache_stats, movie_cache, movie_cache_key
+from .counters import adjust_counters_for_movies, adjust_movie_counters
+from .recommendations import build_movie_neighbors, np
+from .reviews import upsert_review
+from .user_activity import load_daily_activity, rebuild_user_activity
+from .user_stats import get_user_stats
+
+
+class ViewerMixin:
+    """
+    Signs a ``viewer`` user in to ``self.client`` and numbers fixture
+    movies ``tt0000000`` upwards and users ``user1`` upwards.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('viewer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_user(self, username):
+        return User.objects.create(username=username, email=f'{username}@example.com', name=username.title())
+
+    def create_users(self, count):
+        start = User.objects.count()
+        return [self.create_user(f'user{i}') for i in range(start, start + count)]
+
+    def create_movies(self, count, **fields):
+        start = Movie.objects.count()
+        movies = [Movie.objects.create(id=f'tt{i:07d}', title=f'Movie {i}', **fields)
+                  for i in range(start, start + count)]
+        if 'genres' in fields:
+            sync_movie_genres(movies)
+        return movies
+
+
+class AddMovieTests(ViewerMixin, TestCase):
+    def test_update_without_genres_keeps_them(self):
+        url = reverse('add_movie')
+        response = self.client.post(url, {'id': 'tt0000001', 'title': 'Stored', 'genres': ['Drama']}, format='json')
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(url, {'id': 'tt0000001', 'rating': 7.0}, format='json')
+        self.assertEqual(response.status_code, 200)
+        movie = Movie.objects.get(id='tt0000001')
+        self.assertEqual((movie.rating, movie.genres), (7.0, ['Drama']))
+        self.assertEqual(list(MovieGenre.objects.filter(movie=movie).values_list('genre__name', flat=True)),
+                         ['Drama'])
+
+        self.client.post(url, {'id': 'tt0000001', 'genres': 'Comedy'}, format='json')
+        self.assertEqual(Movie.objects.get(id='tt0000001').genres, ['Comedy'])
+
+
+class BulkAddMoviesTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('bulk_add_movies')
+        Movie.objects.create(id='tt0000001', title='Stored', description='Kept', rating=8.0, genres=['Drama'])
+
+    def test_create_update_and_errors(self):
+        response = self.client.post(self.url, [
+            {'id': 'tt0000001', 'rating': 9.0},
+            {'id': 'tt0000002', 'title': 'New', 'genres': ['Comedy']},
+            {'id': 'tt0000002', 'title': 'Again'},
+            {'id': ['tt0000003'], 'title': 'Bad id'},
+            {'id': 'tt0000004'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['errors']), (1, 1, 3))
+        self.assertEqual([result['status'] for result in response.data['results']],
+                         ['updated', 'created', 'error', 'error', 'error'])
+        self.assertIn('id', response.data['results'][2]['errors'])
+        self.assertIn('id', response.data['results'][3]['errors'])
+        self.assertIn('title', response.data['results'][4]['errors'])
+
+        # The partial update leaves the columns it did not send alone
+        stored = Movie.objects.get(id='tt0000001')
+        self.assertEqual((stored.title, stored.description, stored.rating, stored.genres),
+                         ('Stored', 'Kept', 9.0, ['Drama']))
+        self.assertEqual(Movie.objects.get(id='tt0000002').title, 'New')
+        self.assertFalse(Movie.objects.filter(id__in=['tt0000003', 'tt0000004']).exists())
+
+
+class BulkMovieListTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_movies(2, genres=['Drama'])
+        self.create_movies(1, genres=['Comedy'])
+        get_user_stats(self.user)
+
+    def post(self, name, movie_ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse(name), {'movie_ids': movie_ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, field):
+        return dict(Movie.objects.values_list('id', field))
+
+    def test_watchlist_add_and_remove(self):
+        self.post('bulk_add_to_watchlist', ['tt0000000'])
+        data = self.post('bulk_add_to_watchlist', ['tt0000001', 'tt0000000', 'tt9999999', 'tt0000001', 'tt0000002'])
+        self.assertEqual(data, {'added': ['tt0000001', 'tt0000002'], 'already_present': ['tt0000000'],
+                                'unknown': ['tt9999999']})
+        self.assertEqual(self.counts('watch_count'), {'tt0000000': 1, 'tt0000001': 1, 'tt0000002': 1})
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.watched_count, stats.genre_counts), (3, {'Drama': 2, 'Comedy': 1}))
+
+        data = self.post('bulk_remove_from_watchlist', ['tt0000002', 'tt9999999', 'tt0000000'])
+        self.assertEqual(data, {'removed': ['tt0000002', 'tt0000000'], 'not_present': ['tt9999999']})
+        self.assertEqual(self.counts('watch_count'), {'tt0000000': 0, 'tt0000001': 1, 'tt0000002': 0})
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.watched_count, stats.genre_counts), (1, {'Drama': 1}))
+        self.assertEqual(list(Watchlist.objects.filter(user=self.user).values_list('movie_id', flat=True)),
+                         ['tt0000001'])
+
+    def test_watch_later_add_and_remove(self):
+        data = self.post('bulk_add_to_watch_later', ['tt0000000', 'tt0000001', 'tt0000009'])
+        self.assertEqual(data, {'added': ['tt0000000', 'tt0000001'], 'already_present': [],
+                                'unknown': ['tt0000009']})
+        self.assertEqual(self.counts('watch_later_count'), {'tt0000000': 1, 'tt0000001': 1, 'tt0000002': 0})
+        self.assertEqual(UserStats.objects.get(user=self.user).watch_later_count, 2)
+
+        data = self.post('bulk_remove_from_watch_later', ['tt0000001', 'tt0000002'])
+        self.assertEqual(data, {'removed': ['tt0000001'], 'not_present': ['tt0000002']})
+        self.assertEqual(self.counts('watch_later_count'), {'tt0000000': 1, 'tt0000001': 0, 'tt0000002': 0})
+        self.assertEqual(UserStats.objects.get(user=self.user).watch_later_count, 1)
+
+    def test_rejects_bad_payloads(self):
+        for payload in [{}, {'movie_ids': []}, {'movie_ids': 'tt0000000'}]:
+            response = self.client.post(reverse('bulk_add_to_watchlist'), payload, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Watchlist.objects.exists())
+
+
+class ReviewUpsertTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie, = self.create_movies(1)
+        self.url = reverse('create_review', args=[self.movie.id])
+
+    def test_upsert_is_one_statement(self):
+        with self.assertNumQueries(1):
+            review, created = upsert_review(self.user, self.movie.id, 4, 'Good')
+        self.assertTrue(created)
+        with self.assertNumQueries(1):
+            same, created = upsert_review(self.user, self.movie.id, 2, update_text=False)
+        self.assertFalse(created)
+        self.assertEqual((same.id, same.rating, same.review_text), (review.id, 2, 'Good'))
+
+    def test_create_then_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'rating': 4, 'review_text': 'Good'})
+        self.assertEqual(response.status_code, 201)
+
+        # Resubmitting updates the same row; text not sent is kept
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'rating': 2})
+        self.assertEqual(response.status_code, 200)
+        review = Review.objects.get(user=self.user, movie=self.movie)
+        self.assertEqual((review.rating, review.review_text), (2, 'Good'))
+
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.review_count, self.movie.review_rating_sum), (1, 2))
+        stats = get_user_stats(self.user)
+        self.assertEqual((stats.review_count, stats.rating_sum), (1, 2))
+        activity = UserDailyActivity.objects.get(user=self.user)
+        self.assertEqual((activity.reviews, activity.rating_sum), (1, 2))
+
+    def test_query_count_is_fixed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'rating': 4})
+        # Previous rating read and upsert, then one delta each for the movie
+        # counters, the stats row (locked read and write), the daily rollup
+        # and the recommendation rows; the rest are savepoints
+        with self.assertNumQueries(13):
+            self.client.post(self.url, {'rating': 3})
+        # Neither the movie's nor the user's review history is re-read
+        for other in self.create_users(20):
+            Review.objects.create(user=other, movie=self.movie, rating=5)
+        for movie in self.create_movies(20):
+            Review.objects.create(user=self.user, movie=movie, rating=1)
+        with self.assertNumQueries(13):
+            self.client.post(self.url, {'rating': 2})
+        self.movie.refresh_from_db()
+        # The fixture reviews bypass the counters, so only ours is counted
+        self.assertEqual((self.movie.review_count, self.movie.review_rating_sum), (1, 2))
+
+
+class ReviewUpsertMissingMovieTests(ViewerMixin, TransactionTestCase):
+    # The movie's existence is enforced by the foreign key, which SQLite
+    # only checks when the transaction commits
+    def test_unknown_movie_returns_404(self):
+        response = self.client.post(reverse('create_review', args=['tt9999999']), {'rating': 4})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Review.objects.exists())
+
+
+class ImportImdbTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_tsv(self, name, header, rows):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write('\t'.join(header) + '\n')
+            for row in rows:
+                f.write('\t'.join(row) + '\n')
+        return path
+
+    def write_basics(self, *tconsts):
+        header = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult',
+                  'startYear', 'endYear', 'runtimeMinutes', 'genres']
+        return self.write_tsv('title.basics.tsv', header, [
+            [tconst, 'movie', f'Title {tconst}', '\\N', '0', '1999', '\\N', '120', 'Drama,Crime']
+            for tconst in tconsts
+        ])
+
+    def import_imdb(self, *args, **options):
+        call_command('import_imdb', *args, stdout=open(os.devnull, 'w'), **options)
+
+    def test_merge_joins_ratings_in_tconst_order(self):
+        # tt9999999 sorts before tt10000000 in the dumps
+        basics = self.write_basics('tt0000001', 'tt0000002', 'tt9999999', 'tt10000000')
+        ratings = self.write_tsv('title.ratings.tsv', ['tconst', 'averageRating', 'numVotes'], [
+            ['tt0000001', '9.3', '100'], ['tt9999999', '7.0', '5'], ['tt10000000', '6.1', '50'],
+        ])
+        self.import_imdb(basics, ratings=ratings)
+        self.assertEqual(dict(Movie.objects.values_list('id', 'rating')), {
+            'tt0000001': 9.3, 'tt0000002': None, 'tt9999999': 7.0, 'tt10000000': 6.1,
+        })
+        self.assertEqual(Movie.objects.get(id='tt0000001').genres, ['Drama', 'Crime'])
+
+    def test_import_without_ratings_keeps_stored_ratings(self):
+        Movie.objects.create(id='tt0000001', title='Old', rating=9.3, num_votes=100, description='Kept')
+        self.import_imdb(self.write_basics('tt0000001'))
+        movie = Movie.objects.get(id='tt0000001')
+        self.assertEqual((movie.title, movie.rating, movie.num_votes, movie.description),
+                         ('Title tt0000001', 9.3, 100, 'Kept'))
+
+    def test_resume_skips_checkpointed_titles(self):
+        basics = self.write_basics('tt0000001', 'tt0000002', 'tt0000003')
+        checkpoint = os.path.join(self.directory, 'checkpoint.json')
+        with open(checkpoint, 'w') as f:
+            json.dump({'last_tconst': 'tt0000002'}, f)
+        self.import_imdb(basics, checkpoint=checkpoint, resume=True, batch_size=1)
+        self.assertEqual(list(Movie.objects.values_list('id', flat=True)), ['tt0000003'])
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f), {'last_tconst': 'tt0000003'})
+
+
+class MovieReviewsQueryTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie, = self.create_movies(1)
+        self.url = reverse('get_movie_reviews', args=[self.movie.id])
+
+    def add_reviews(self, count):
+        for user in self.create_users(count):
+            Review.objects.create(user=user, movie=self.movie, rating=4)
+
+    def test_first_page_query_count_is_constant(self):
+        # existence check, ETag aggregate and one page query with the authors joined in
+        self.add_reviews(3)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results']), 3)
+
+        self.add_reviews(30)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_cursor_walks_every_review_once(self):
+        self.add_reviews(25)
+        seen = []
+        response = self.client.get(self.url, {'limit': 10})
+        while True:
+            seen.extend(review['id'] for review in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            response = self.client.get(self.url, {'limit': 10, 'cursor': response.data['next_cursor']})
+        self.assertEqual(sorted(seen), sorted(Review.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_unknown_movie_returns_404(self):
+        response = self.client.get(reverse('get_movie_reviews', args=['tt9999999']))
+        self.assertEqual(response.status_code, 404)
+
+
+class UserMovieListQueryTests(ViewerMixin, TestCase):
+    def add_movies(self, count):
+        for movie in self.create_movies(count):
+            Watchlist.objects.create(user=self.user, movie=movie)
+            WatchLater.objects.create(user=self.user, movie=movie)
+            Review.objects.create(user=self.user, movie=movie, rating=4)
+
+    def test_expanded_lists_query_count_is_constant(self):
+        # the ETag aggregate where the list has one, then a single page query
+        # with the author and movie joined in
+        for name, queries in [('get_watchlist', 2), ('get_watch_later', 2), ('get_user_reviews', 1)]:
+            with self.subTest(name):
+                Movie.objects.all().delete()
+                self.add_movies(2)
+                with self.assertNumQueries(queries):
+                    response = self.client.get(reverse(name), {'expand': 'movie'})
+                self.assertEqual(len(response.data), 2)
+                self.assertEqual({item['movie']['title'] for item in response.data}, {'Movie 0', 'Movie 1'})
+
+                self.add_movies(20)
+                with self.assertNumQueries(queries):
+                    response = self.client.get(reverse(name), {'expand': 'movie'})
+                self.assertEqual(len(response.data), 22)
+
+    def test_unknown_expansion_is_rejected(self):
+        response = self.client.get(reverse('get_watchlist'), {'expand': 'user'})
+        self.assertEqual(response.status_code, 400)
+
+
+class MovieListPaginationTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('get_all_movies')
+        # Plenty of ties, plus movies without a rating
+        for rating in [7.0, 8.5, None, 7.0, 6.0, 8.5, 7.0, None, 9.0, 6.0] * 3:
+            self.create_movies(1, rating=rating, review_count=1, review_rating_sum=4)
+
+    def walk(self, **params):
+        seen = []
+        params['limit'] = 4
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(movie['id'] for movie in response.data['results'])
+            if not response.data['next_cursor']:
+                return seen
+            params['cursor'] = response.data['next_cursor']
+
+    def test_cursor_walks_every_rated_movie_once(self):
+        rated = Movie.objects.exclude(rating=None)
+        for ordering in ['rating', '-rating']:
+            with self.subTest(ordering):
+                expected = list(rated.order_by(ordering, ordering.replace('rating', 'id'))
+                                .values_list('id', flat=True))
+                self.assertEqual(self.walk(ordering=ordering), expected)
+        self.assertEqual(len(self.walk()), Movie.objects.count())
+
+    def test_bad_parameters_are_rejected(self):
+        for params in [{'ordering': 'title'}, {'cursor': 'not-a-cursor'}, {'limit': 0},
+                       {'fields': 'title,secret'}]:
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_fields_prune_the_payload_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'fields': 'title,community_rating', 'limit': 2})
+        self.assertEqual(response.data['results'][0], {'title': 'Movie 0', 'community_rating': 4.0})
+        self.assertNotIn('image_url', queries[0]['sql'])
+
+    def test_default_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(list(response.data['results'][0]),
+                         ['id', 'title', 'image_url', 'rating', 'community_rating', 'review_count'])
+        sql = queries[0]['sql']
+        for column in ['review_rating_sum', 'image_url']:
+            self.assertIn(f'"{column}"', sql)
+        for column in ['description', 'genres', 'countries']:
+            self.assertNotIn(f'"{column}"', sql)
+
+
+class MovieSearchTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('search_movies')
+        for title, description in [
+            ('The Night Watch', 'A zebra escapes from the zoo'),
+            ('Zebra', 'Stripes'),
+            ('Ocean', 'Nothing to see'),
+            ('Zebrafish Tales', 'Small fish'),
+        ]:
+            Movie.objects.create(id=f'tt{Movie.objects.count():07d}', title=title, description=description)
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [movie['id'] for movie in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        results = self.search('zebra')
+        # Prefix terms match Zebrafish too; the description match ranks last
+        self.assertEqual(set(results[:2]), {'tt0000001', 'tt0000003'})
+        self.assertEqual(results[2:], ['tt0000000'])
+        self.assertEqual(self.search('nig zeb'), ['tt0000000'])
+        self.assertEqual(self.search('zebra ocean'), [])
+        self.assertEqual(self.client.get(self.url, {'q': ' '}).status_code, 400)
+
+    def test_pages_follow_the_ranking(self):
+        ranked = self.search('zebra')
+        seen = []
+        response = self.client.get(self.url, {'q': 'zebra', 'page_size': 2})
+        while True:
+            seen.extend(movie['id'] for movie in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, ranked)
+        self.assertEqual(response.data['page'], 2)
+
+    def test_orm_writes_are_reindexed(self):
+        movie = Movie.objects.get(id='tt0000002')
+        movie.title = 'Zebra Stampede'
+        movie.save()
+        self.assertEqual(self.search('stampede'), ['tt0000002'])
+        self.assertEqual(self.search('ocean'), [])
+        Movie.objects.filter(id='tt0000001').delete()
+        self.assertNotIn('tt0000001', self.search('zebra'))
+
+
+class MovieFilterTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('get_all_movies')
+        for genres, year, language, rating, votes, adult in [
+            (['Drama', 'Comedy'], 1995, 'English', 8.0, 1000, False),
+            (['Drama'], 2001, 'French', 6.0, 50, False),
+            (['Comedy'], 2005, 'English', 7.5, 500, True),
+            (['Drama', 'Comedy'], 2010, 'English', None, None, False),
+        ]:
+            self.create_movies(1, genres=genres, start_year=year, language=language,
+                               rating=rating, num_votes=votes, is_adult=adult)
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [movie['id'] for movie in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.ids(genre='Drama,Comedy'), ['tt0000000', 'tt0000003'])
+        self.assertEqual(self.ids(genre='Drama,Horror'), [])
+        self.assertEqual(self.ids(year_min=2000, year_max=2005), ['tt0000001', 'tt0000002'])
+        self.assertEqual(self.ids(language='English'), ['tt0000000', 'tt0000002', 'tt0000003'])
+        self.assertEqual(self.ids(min_rating=7), ['tt0000000', 'tt0000002'])
+        self.assertEqual(self.ids(min_votes=500), ['tt0000000', 'tt0000002'])
+        self.assertEqual(self.ids(is_adult='true'), ['tt0000002'])
+        self.assertEqual(self.ids(is_adult='0'), ['tt0000000', 'tt0000001', 'tt0000003'])
+        self.assertEqual(self.ids(genre='Comedy', language='English', year_min=2000), ['tt0000002', 'tt0000003'])
+
+    def test_bad_values_are_rejected(self):
+        for params in [{'year_min': 'abc'}, {'min_rating': 'high'}, {'min_votes': '1.5'}, {'is_adult': 'maybe'}]:
+            with self.subTest(params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), list(params))
+
+    def test_facets_are_one_query(self):
+        # the page query and one UNION ALL aggregate
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'facets': 'true', 'language': 'English'})
+        self.assertEqual(response.data['facets'], {
+            'genres': {'Drama': 2, 'Comedy': 3}, 'decades': {'1990s': 1, '2000s': 1, '2010s': 1}})
+
+        self.create_movies(30, genres=['Horror', 'Drama'], start_year=1980, language='English')
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'facets': 'true', 'language': 'English'})
+        self.assertEqual(response.data['facets']['genres'], {'Drama': 32, 'Comedy': 3, 'Horror': 30})
+        self.assertEqual(response.data['facets']['decades']['1980s'], 30)
+        self.assertNotIn('facets', self.client.get(self.url).data)
+
+    def test_keyset_pages_follow_filters(self):
+        seen = []
+        params = {'genre': 'Drama', 'ordering': '-rating', 'limit': 1}
+        while True:
+            response = self.client.get(self.url, params)
+            seen.extend(movie['id'] for movie in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+        # tt0000003 has no rating, so it has no place in the keyset
+        self.assertEqual(seen, ['tt0000000', 'tt0000001'])
+
+
+class MovieCacheTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        movie_cache().clear()
+        self.addCleanup(movie_cache().clear)
+        self.movie, self.other = self.create_movies(2)
+
+    def cached(self, movie):
+        return movie_cache().get(movie_cache_key(movie.id)) is not None
+
+    def load(self, *movies):
+        for movie in movies:
+            self.client.get(reverse('get_movie_detail', args=[movie.id]))
+        self.assertTrue(all(self.cached(movie) for movie in movies))
+
+    def test_read_through_counts_hits_and_misses(self):
+        url = reverse('get_movie_detail', args=[self.movie.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['title'], self.movie.title)
+        # Unknown ids miss every time, as they are not cached
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('get_movie_detail', args=['tt9999999'])).status_code, 404)
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 3, 'hit_rate': 25.0})
+
+    def test_signals_invalidate(self):
+        self.load(self.movie, self.other)
+        self.movie.title = 'Renamed'
+        self.movie.save()
+        self.assertFalse(self.cached(self.movie))
+        self.assertTrue(self.cached(self.other))
+        self.other.delete()
+        self.assertFalse(self.cached(self.other))
+
+    def test_bulk_add_invalidates(self):
+        self.load(self.movie, self.other)
+        self.client.post(reverse('bulk_add_movies'), [{'id': self.movie.id, 'rating': 6.0}], format='json')
+        self.assertFalse(self.cached(self.movie))
+        self.assertTrue(self.cached(self.other))
+        response = self.client.get(reverse('get_movie_detail', args=[self.movie.id]))
+        self.assertEqual(response.data['rating'], 6.0)
+
+    def test_counter_updates_invalidate_on_commit(self):
+        self.load(self.movie, self.other)
+        with self.captureOnCommitCallbacks() as callbacks:
+            adjust_movie_counters(self.movie.id, watch_count=1)
+            adjust_counters_for_movies([self.other.id], watch_later_count=1)
+        # Readers keep the old payload until the new counts are committed
+        self.assertTrue(self.cached(self.movie) and self.cached(self.other))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(self.cached(self.movie) or self.cached(self.other))
+
+    def test_stats_are_admin_only(self):
+        url = reverse('get_movie_cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(set(self.client.get(url).data), {'hits', 'misses', 'hit_rate'})
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+
+class MovieStatesTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('get_movie_states')
+        self.movies = self.create_movies(3)
+
+    def test_compact_map_in_three_queries(self):
+        first, second, third = self.movies
+        Watchlist.objects.create(user=self.user, movie=first)
+        WatchLater.objects.create(user=self.user, movie=second)
+        Review.objects.create(user=self.user, movie=first, rating=4.5)
+        # Other users' rows do not leak into the map
+        other, = self.create_users(1)
+        Watchlist.objects.create(user=other, movie=third)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'ids': f'{first.id},{second.id}, {third.id},{first.id},tt9999999'})
+        self.assertEqual(response.data, {
+            first.id: {'watched': True, 'watch_later': False, 'rating': 4.5},
+            second.id: {'watched': False, 'watch_later': True, 'rating': None},
+            third.id: {'watched': False, 'watch_later': False, 'rating': None},
+            'tt9999999': {'watched': False, 'watch_later': False, 'rating': None},
+        })
+
+        for movie in self.create_movies(50):
+            Watchlist.objects.create(user=self.user, movie=movie)
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'ids': ','.join(f'tt{i:07d}' for i in range(53))})
+
+    def test_id_limits(self):
+        for ids in ['', ' , ', ','.join(f'tt{i:07d}' for i in range(501))]:
+            with self.subTest(len(ids)):
+                self.assertEqual(self.client.get(self.url, {'ids': ids}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        # Duplicates count once towards the limit
+        response = self.client.get(self.url, {'ids': ','.join(['tt0000000'] * 501)})
+        self.assertEqual(list(response.data), ['tt0000000'])
+
+
+class ConditionalRequestTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        movie_cache().clear()
+        self.addCleanup(movie_cache().clear)
+        self.movie, self.other = self.create_movies(2)
+        # HTTP dates have one second resolution, so start from an older change
+        Movie.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def assertNotModified(self, url, params=None, **headers):
+        response = self.client.get(url, params, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_movie_detail_last_modified(self):
+        url = reverse('get_movie_detail', args=[self.movie.id])
+        since = self.client.get(url)['Last-Modified']
+        with mock.patch.object(views, 'get_movie_payload', wraps=views.get_movie_payload) as get_payload:
+            self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=since)
+        get_payload.assert_not_called()
+
+        # A counter update bumps updated_at and drops the cached payload on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('add_to_watchlist', args=[self.movie.id]))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual((response.status_code, response.data['watch_count']), (200, 1))
+        self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        # So does an edit through the serializer
+        Movie.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        movie_cache().clear()
+        since = self.client.get(url)['Last-Modified']
+        self.client.post(reverse('add_movie'), {'id': self.movie.id, 'title': 'Renamed'}, format='json')
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual((response.status_code, response.data['title']), (200, 'Renamed'))
+
+    def test_user_lists_etag(self):
+        for name, add, remove in [('get_watchlist', 'add_to_watchlist', 'remove_from_watchlist'),
+                                  ('get_watch_later', 'add_to_watch_later', 'remove_from_watch_later')]:
+            with self.subTest(name):
+                url = reverse(name)
+                self.client.post(reverse(add, args=[self.movie.id]))
+                params = {'expand': 'movie'}
+                etag = self.client.get(url, params)['ETag']
+                # Only the ETag aggregate runs, nothing is serialized
+                with mock.patch.object(views, 'serialize_user_movie_list') as serialize, \
+                        self.assertNumQueries(1):
+                    self.assertNotModified(url, params, HTTP_IF_NONE_MATCH=etag)
+                serialize.assert_not_called()
+
+                # Each list only tracks the embedded movies when it is expanded
+                plain_etag = self.client.get(url)['ETag']
+                self.client.post(reverse('add_movie'), {'id': self.movie.id, 'rating': 5.0}, format='json')
+                self.assertNotModified(url, HTTP_IF_NONE_MATCH=plain_etag)
+                response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data[0]['movie']['id'], self.movie.id)
+
+                for change in [lambda: self.client.post(reverse(add, args=[self.other.id])),
+                               lambda: self.client.delete(reverse(remove, args=[self.other.id]))]:
+                    etag = response['ETag']
+                    change()
+                    response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_movie_reviews_etag(self):
+        url = reverse('get_movie_reviews', args=[self.movie.id])
+        self.client.post(reverse('create_review', args=[self.movie.id]), {'rating': 4})
+        etag = self.client.get(url)['ETag']
+        with mock.patch.object(views, 'ReviewSerializer') as serializer:
+            self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+        serializer.assert_not_called()
+
+        other, = self.create_users(1)
+        Review.objects.create(user=other, movie=self.movie, rating=2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, len(response.data['results'])), (200, 2))
+
+        review = Review.objects.get(user=self.user)
+        self.client.delete(reverse('manage_review', args=[review.id]))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((response.status_code, len(response.data['results'])), (200, 1))
+
+
+class GenreAnalyticsQueryTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('get_genre_analytics')
+
+    def watch(self, count, genres, rating=None, days_ago=0):
+        for movie in self.create_movies(count, genres=genres):
+            watch = Watchlist.objects.create(user=self.user, movie=movie)
+            if days_ago:
+                Watchlist.objects.filter(pk=watch.pk).update(
+                    watched_at=timezone.now() - timedelta(days=days_ago))
+            if rating is not None:
+                Review.objects.create(user=self.user, movie=movie, rating=rating)
+
+    def test_query_count_does_not_grow_with_watches(self):
+        self.watch(2, ['Drama'], rating=4)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        self.watch(40, ['Drama', 'Comedy', 'Horror'], rating=3)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['distribution']['Drama'], 42)
+
+    def test_aggregates(self):
+        self.watch(2, ['Drama', 'Comedy'], rating=4)
+        self.watch(1, ['Drama'], rating=2, days_ago=60)
+        self.watch(1, ['Comedy'], days_ago=60)
+
+        data = self.client.get(self.url).data
+        self.assertEqual(data['distribution'], {'Drama': 3, 'Comedy': 3})
+        averages = {row['genre']: row['average_rating'] for row in data['favorite_genres']}
+        self.assertEqual(averages, {'Drama': 3.3, 'Comedy': 4.0})
+        recent = {row['genre']: row['recent_watches'] for row in data['trending_genres']}
+        self.assertEqual(recent, {'Drama': 2, 'Comedy': 2})
+
+
+class RatingAnalyticsTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('get_rating_analytics')
+
+    def rate(self, ratings):
+        for movie, rating in zip(self.create_movies(len(ratings)), ratings):
+            Review.objects.create(user=self.user, movie=movie, rating=rating)
+
+    def test_query_count_does_not_grow_with_reviews(self):
+        self.rate([4])
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        self.rate([1, 2.5, 3.5, 5] * 20)
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+    def test_distribution_and_summary(self):
+        self.rate([0.5, 1.5, 2.5, 3, 3.5, 4.5, 5, 5])
+        data = self.client.get(self.url).data
+        # Halves round to even, as round() does
+        self.assertEqual(data['distribution'],
+                         {'5_stars': 2, '4_stars': 2, '3_stars': 1, '2_stars': 2, '1_star': 1})
+        self.assertEqual(data['summary']['count'], 8)
+        self.assertEqual(data['summary']['median'], 3.25)
+        self.assertEqual(data['summary']['percentiles']['25'], 2.25)
+        self.assertEqual(data['summary']['std_dev'], 1.54)
+
+
+class UserStatsTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        movies = self.create_movies(7, genres=['Drama'])
+        # History written before the user had a stats row
+        for movie in movies[:5]:
+            Watchlist.objects.create(user=self.user, movie=movie)
+        Review.objects.create(user=self.user, movie_id='tt0000000', rating=4)
+
+    def test_first_write_keeps_existing_history(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('add_to_watchlist', args=['tt0000005']))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('add_to_watch_later', args=['tt0000006']))
+        review = Review.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(reverse('manage_review', args=[review.id]), {'rating': 5})
+
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.watched_count, stats.watch_later_count), (6, 1))
+        self.assertEqual((stats.review_count, stats.rating_sum), (1, 5))
+        self.assertEqual(stats.genre_counts, {'Drama': 6})
+        data = self.client.get(reverse('get_user_statistics')).data
+        self.assertEqual(data['total_movies_watched'], 6)
+
+
+class AnalyticsDashboardTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('get_analytics_dashboard')
+        # The first write builds the stats row on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for movie in self.create_movies(10, genres=['Drama'], runtime_minutes=90):
+                self.client.post(reverse('add_to_watchlist', args=[movie.id]))
+                self.client.post(reverse('create_review', args=[movie.id]), {'rating': 4})
+
+    def test_all_sections_from_one_snapshot(self):
+        # stats row, watches with ratings, daily activity, top rated and
+        # the three rating aggregates
+        with self.assertNumQueries(7):
+            response = self.client.get(self.url)
+        self.assertEqual(set(response.data), {'statistics', 'genres', 'ratings', 'watch_history', 'highlights'})
+        self.assertEqual(response.data['statistics']['total_movies_watched'], 10)
+        self.assertEqual(response.data['genres']['distribution'], {'Drama': 10})
+        self.assertEqual(response.data['ratings']['distribution']['4_stars'], 10)
+
+        # Cached until the user's next write
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        movie, = self.create_movies(1, genres=['Comedy'])
+        self.client.post(reverse('add_to_watchlist', args=[movie.id]))
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['genres']['distribution'], {'Drama': 10, 'Comedy': 1})
+
+    def test_sections_filter(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'sections': 'statistics'})
+        self.assertEqual(list(response.data), ['statistics'])
+        response = self.client.get(self.url, {'sections': 'genres,unknown'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DailyActivityTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_movies(6, runtime_minutes=100)
+
+    def test_writes_match_rebuild(self):
+        for i in range(4):
+            self.client.post(reverse('add_to_watchlist', args=[f'tt{i:07d}']))
+            self.client.post(reverse('create_review', args=[f'tt{i:07d}']), {'rating': 4})
+        self.client.post(reverse('bulk_add_to_watchlist'), {'movie_ids': ['tt0000004', 'tt0000005']}, format='json')
+        self.client.post(reverse('create_review', args=['tt0000000']), {'rating': 2})
+        self.client.delete(reverse('remove_from_watchlist', args=['tt0000001']))
+        self.client.post(reverse('bulk_remove_from_watchlist'), {'movie_ids': ['tt0000004']}, format='json')
+        review = Review.objects.get(user=self.user, movie_id='tt0000002')
+        self.client.delete(reverse('manage_review', args=[review.id]))
+
+        incremental = load_daily_activity(self.user)
+        self.assertEqual(incremental[0]['watches'], 4)
+        self.assertEqual(incremental[0]['runtime_minutes'], 400)
+        self.assertEqual((incremental[0]['reviews'], incremental[0]['rating_sum']), (3, 10))
+        rebuild_user_activity([self.user.pk])
+        self.assertEqual(load_daily_activity(self.user), incremental)
+
+    def test_streaks_read_the_rollup(self):
+        today = timezone.localdate()
+        for days_ago in (0, 1, 2, 5, 6):
+            UserDailyActivity.objects.create(user=self.user, date=today - timedelta(days=days_ago), watches=1)
+        UserDailyActivity.objects.create(user=self.user, date=today - timedelta(days=3), reviews=1)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('get_user_highlights'))
+        self.assertEqual(response.data['watching_streak'],
+                         {'current_streak': 3, 'longest_streak': 3, 'total_active_days': 5})
+
+
+class RecentActivityFeedTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('get_recent_activity')
+
+    def add_activity(self, count):
+        for i, movie in enumerate(self.create_movies(count)):
+            Watchlist.objects.create(user=self.user, movie=movie)
+            if i % 2:
+                Review.objects.create(user=self.user, movie=movie, rating=3)
+
+    def test_page_query_count_is_constant(self):
+        # review page, watch page and the stats row for the total
+        self.add_activity(4)
+        self.client.get(self.url)  # builds the stats row
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        self.add_activity(60)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'limit': 10})
+        self.assertEqual(len(response.data['activities']), 10)
+
+    def test_cursor_walks_newest_first(self):
+        self.add_activity(15)
+        seen = []
+        params = {'limit': 4}
+        while True:
+            response = self.client.get(self.url, params)
+            seen.extend(response.data['activities'])
+            if not response.data['next_before']:
+                break
+            params['before'] = response.data['next_before']
+        self.assertEqual(len(seen), Watchlist.objects.count() + Review.objects.count())
+        self.assertEqual(len({(activity['type'], activity['id']) for activity in seen}), len(seen))
+        dates = [activity['action_date'] for activity in seen]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+
+class RecommendationTests(ViewerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = [self.user, *self.create_users(3)]
+        self.create_movies(6)
+        self.url = reverse('get_recommendations')
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def review(self, user, movie_ids, rating):
+        for movie_id in movie_ids:
+            Review.objects.create(user=user, movie_id=movie_id, rating=rating)
+
+    def test_scores_neighbors_of_liked_movies(self):
+        self.review(self.users[0], ['tt0000000'], 5)
+        self.review(self.users[0], ['tt0000001'], 2)
+        MovieNeighbor.objects.bulk_create([
+            MovieNeighbor(movie_id='tt0000000', neighbor_id='tt0000002', score=0.9),
+            MovieNeighbor(movie_id='tt0000000', neighbor_id='tt0000003', score=0.5),
+            MovieNeighbor(movie_id='tt0000000', neighbor_id='tt0000001', score=0.8),  # already reviewed
+            MovieNeighbor(movie_id='tt0000001', neighbor_id='tt0000004', score=1.0),  # not liked
+        ])
+        # nothing cached or precomputed yet, so scored on the fly, then the
+        # existence check of the recommended movies
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual([row['movie'] for row in response.data['results']], ['tt0000002', 'tt0000003'])
+        self.assertEqual(response.data['results'][0]['score'], 4.5)
+        # Cached: only the existence check
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).data, response.data)
+
+    def test_results_skip_deleted_movies(self):
+        self.review(self.users[0], ['tt0000000'], 5)
+        MovieNeighbor.objects.bulk_create([
+            MovieNeighbor(movie_id='tt0000000', neighbor_id='tt0000002', score=0.9),
+            MovieNeighbor(movie_id='tt0000000', neighbor_id='tt0000003', score=0.5),
+        ])
+        self.client.get(self.url)
+        Movie.objects.filter(id='tt0000002').delete()
+        response = self.client.get(self.url)
+        self.assertEqual([row['movie'] for row in response.data['results']], ['tt0000003'])
+        response = self.client.get(self.url, {'expand': 'movie'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['movie']['id'] for row in response.data['results']], ['tt0000003'])
+
+    def test_cache_follows_taste_changes(self):
+        self.review(self.users[0], ['tt0000000'], 5)
+        MovieNeighbor.objects.bulk_create([
+            MovieNeighbor(movie_id='tt0000000', neighbor_id='tt0000002', score=0.9),
+            MovieNeighbor(movie_id='tt0000000', neighbor_id='tt0000003', score=0.5),
+            MovieNeighbor(movie_id='tt0000001', neighbor_id='tt0000004', score=1.0),
+        ])
+        self.client.get(self.url)
+
+        # Watching a movie or rating one low only drops it from the cached results
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('add_to_watchlist', args=['tt0000003']))
+            self.client.post(reverse('create_review', args=['tt0000005']), {'rating': 2})
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual([row['movie'] for row in response.data['results']], ['tt0000002'])
+
+        # A newly liked movie serves the stale results while they are refreshed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('create_review', args=['tt0000001']), {'rating': 5})
+        with mock.patch.object(recommendation_cache, 'schedule_refresh') as schedule_refresh:
+            response = self.client.get(self.url)
+        schedule_refresh.assert_called_once_with(self.users[0].pk)
+        self.assertEqual([row['movie'] for row in response.data['results']], ['tt0000002'])
+
+        recommendation_cache.refresh_recommendations(self.users[0].pk)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual([row['movie'] for row in response.data['results']], ['tt0000004', 'tt0000002'])
+        self.assertEqual(list(UserRecommendation.objects.filter(user=self.users[0]).order_by('rank')
+                              .values_list('movie_id', flat=True)), ['tt0000004', 'tt0000002'])
+
+    @skipIf(np is None, "numpy and scipy are not installed")
+    def test_precompute_matches_online_scoring(self):
+        for user in self.users[:3]:
+            self.review(user, ['tt0000000', 'tt0000001'], 5)
+        self.review(self.users[1], ['tt0000002'], 4)
+        self.review(self.users[2], ['tt0000002', 'tt0000003'], 4)
+        self.review(self.users[3], ['tt0000000'], 5)
+        build_movie_neighbors(k=5)
+        online = self.client.get(self.url).data
+        self.assertTrue(online['results'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('precompute_recommendations', workers=1, stdout=open(os.devnull, 'w'),
+                         checkpoint=os.path.join(directory, 'checkpoint.json'))
+        self.assertTrue(UserRecommendation.objects.filter(user=self.users[3]).exists())
+        cache.clear()
+        # precomputed rows, the liked movies kept for invalidation and the existence check
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data, online)
+
+    @skipIf(np is None, "numpy and scipy are not installed")
+    def test_build_finds_co_rated_movies(self):
+        for user in self.users[:3]:
+            self.review(user, ['tt0000000', 'tt0000001'], 5)
+        self.review(self.users[3], ['tt0000004', 'tt0000005'], 4)
+        build_movie_neighbors(k=5)
+
+        neighbors = set(MovieNeighbor.objects.values_list('movie_id', 'neighbor_id'))
+        self.assertEqual(neighbors, {('tt0000000', 'tt0000001'), ('tt0000001', 'tt0000000'),
+                                     ('tt0000004', 'tt0000005'), ('tt0000005', 'tt0000004')})
+        self.assertAlmostEqual(MovieNeighbor.objects.get(movie_id='tt0000000').score, 1.0, places=5)
+
+
+@skipIf(np is None, "numpy and scipy are not installed")
+class SimilarMoviesTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(similarity, 'SIMILARITY_DIR', directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        space = 'An astronaut crew explores a distant planet and meets an alien'
+        romance = 'A couple falls in love during a summer wedding in Paris'
+        for i, (genres, description) in enumerate([
+            (['Sci-Fi', 'Adventure'], space),
+            (['Sci-Fi', 'Adventure'], space + ' race'),
+            (['Sci-Fi'], 'The alien planet hides a secret from the astronaut'),
+            (['Romance', 'Comedy'], romance),
+            (['Romance'], romance + ' again'),
+        ]):
+            Movie.objects.create(id=f'tt{i:07d}', title=f'Movie {i}', genres=genres,
+                                 start_year=2000 + i, language='English', description=description)
+        similarity.build_similarity_index(directory.name)
+
+    def test_nearest_movies_share_content(self):
+        response = self.client.get(reverse('get_similar_movies', args=['tt0000000']), {'limit': 2})
+        self.assertEqual([row['movie'] for row in response.data['results']], ['tt0000001', 'tt0000002'])
+
+    def test_titles_added_after_the_build(self):
+        Movie.objects.create(id='tt0000009', title='New', genres=['Romance'], description='A wedding in love')
+        response = self.client.get(reverse('get_similar_movies', args=['tt0000009']), {'limit': 1})
+        self.assertIn(response.data['results'][0]['movie'], ['tt0000003', 'tt0000004'])
+
+    def test_deleted_movies_are_skipped(self):
+        Movie.objects.filter(id='tt0000001').delete()
+        url = reverse('get_similar_movies', args=['tt0000000'])
+        for params in [{'limit': 2}, {'limit': 2, 'expand': 'movie'}]:
+            with self.subTest(params):
+                with self.assertNumQueries(2):
+                    response = self.client.get(url, params)
+                results = [row['movie'] for row in response.data['results']]
+                if 'expand' in params:
+                    results = [movie['id'] for movie in results]
+                self.assertEqual(results, ['tt0000002'])
+
+    def test_unknown_movie_returns_404(self):
+        response = self.client.get(reverse('get_similar_movies', args=['tt9999999']))
+        self.assertEqual(response.status_code, 404)
+
+
+class FakeImdbHandler(BaseHTTPRequestHandler):
+    # A stand-in for the RapidAPI IMDb endpoints the gateway calls
+    titles = {
+        'tt0000001': {'id': 'tt0000001', 'primaryTitle': 'Fake Movie', 'genres': ['Drama'],
+                      'startYear': 2001, 'averageRating': 7.5, 'spokenLanguages': ['English']},
+    }
+    paths = []
+    delay = 0
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        time.sleep(self.delay)
+        if self.path.startswith('/imdb/search?'):
+            self.reply(200, {'results': list(self.titles.values())})
+        elif self.path[len('/imdb/'):] in self.titles:
+            self.reply(200, self.titles[self.path[len('/imdb/'):]])
+        else:
+            self.reply(404, {'message': 'Not found'})
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@skipIf(imdb.httpx is None, "httpx is not installed")
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'movies': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'movies'},
+    'imdb': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'imdb-tests'},
+})
+class ImdbGatewayTests(ViewerMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeImdbHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        FakeImdbHandler.paths = []
+        FakeImdbHandler.delay = 0
+        caches['imdb'].clear()
+        gateway = imdb.ImdbGateway(f'http://127.0.0.1:{self.server.server_port}/imdb',
+                                   api_key='test', host='imdb.test', rate=100, burst=100)
+        self.addCleanup(gateway.close)
+        patcher = mock.patch.object(imdb, '_gateway', gateway)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.gateway = gateway
+
+    def test_title_is_cached_and_written_through(self):
+        url = reverse('get_imdb_title', args=['tt0000001'])
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.data['title'], 'Fake Movie')
+        self.assertEqual(FakeImdbHandler.paths, ['/imdb/tt0000001'])
+
+        movie = Movie.objects.get(id='tt0000001')
+        self.assertEqual((movie.title, movie.language, movie.rating), ('Fake Movie', 'English', 7.5))
+        self.assertEqual(self.client.get(reverse('search_movies'), {'q': 'fake'}).data['results'][0]['id'],
+                         'tt0000001')
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.client.get(reverse('search_imdb'), {'q': 'fake'}).status_code, 401)
+        self.assertEqual(len(FakeImdbHandler.paths), 1)
+        self.client.force_authenticate(self.user)
+
+        # Unknown titles are cached as misses too
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('get_imdb_title', args=['tt0000002'])).status_code, 404)
+        self.assertEqual(FakeImdbHandler.paths.count('/imdb/tt0000002'), 1)
+
+    def test_sparse_results_keep_stored_columns(self):
+        Movie.objects.create(id='tt0000001', title='Old title', description='Stored description',
+                             budget=1000, language='French')
+        response = self.client.get(reverse('search_imdb'), {'q': 'fake'})
+        self.assertEqual(response.data['results'][0]['id'], 'tt0000001')
+        movie = Movie.objects.get(id='tt0000001')
+        self.assertEqual((movie.title, movie.rating), ('Fake Movie', 7.5))
+        self.assertEqual((movie.description, movie.budget, movie.language),
+                         ('Stored description', 1000, 'English'))
+
+    def test_concurrent_identical_searches_share_one_request(self):
+        FakeImdbHandler.delay = 0.2
+        params = {'type': 'movie', 'primaryTitleAutocomplete': 'fake', 'rows': 24, 'page': 1}
+        results = []
+
+        def search():
+            results.append(self.gateway.get('/search', params, 60))
+        threads = [threading.Thread(target=search) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(FakeImdbHandler.paths), 1)
+        self.assertEqual(sum(fetched for _, _, fetched in results), 1)
+        self.assertTrue(all(body['results'][0]['id'] == 'tt0000001' for _, body, _ in results))
+
+    def test_rate_limiter_rejects_long_waits(self):
+        bucket = imdb.TokenBucket(rate=1, capacity=2, clock=lambda: 0)
+        asyncio.run(bucket.acquire())
+        asyncio.run(bucket.acquire())
+        with self.assertRaises(imdb.ImdbUnavailable) as raised:
+            asyncio.run(bucket.acquire(max_wait=0.5))
+        self.assertEqual(raised.exception.retry_after, 1)
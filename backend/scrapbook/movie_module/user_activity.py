@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Review, UserDailyActivity, Watchlist
+
+REBUILD_BATCH_SIZE = 500
+
+
+def _adjust_day(user, day, **deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    days = UserDailyActivity.objects.filter(user=user, date=day)
+    if not days.update(**changes):
+        # First activity of the day; a concurrent writer may create it first
+        UserDailyActivity.objects.bulk_create([UserDailyActivity(user=user, date=day)], ignore_conflicts=True)
+        days.update(**changes)
+
+
+def record_watch_activity(user, movie_ids, delta):
+    """
+    Add (delta=1) or remove (delta=-1) the user's watches of ``movie_ids``
+    from their days. Call while the Watchlist rows exist: after inserting
+    them, or before deleting them.
+    """
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    days = defaultdict(lambda: [0, 0])
+    for watched_at, runtime in Watchlist.objects.filter(user=user, movie_id__in=movie_ids) \
+            .values_list('watched_at', 'movie__runtime_minutes'):
+        day = days[timezone.localdate(watched_at)]
+        day[0] += 1
+        day[1] += runtime or 0
+    with transaction.atomic():
+        for day, (watches, runtime) in days.items():
+            _adjust_day(user, day, watches=delta * watches, runtime_minutes=delta * runtime)
+
+
+def record_review_activity(user, created_at, count_delta, rating_delta):
+    with transaction.atomic():
+        _adjust_day(user, timezone.localdate(created_at), reviews=count_delta, rating_sum=rating_delta)
+
+
+def refresh_review_activity(user, created_at):
+    # For writes that do not know the previous rating (see upsert_review)
+    day = timezone.localdate(created_at)
+    totals = Review.objects.filter(user=user, created_at__date=day) \
+        .aggregate(count=Count('id'), total=Sum('rating'))
+    with transaction.atomic():
+        UserDailyActivity.objects.bulk_create([UserDailyActivity(user=user, date=day)], ignore_conflicts=True)
+        UserDailyActivity.objects.filter(user=user, date=day) \
+            .update(reviews=totals['count'], rating_sum=totals['total'] or 0)
+
+
+def rebuild_user_activity(user_ids):
+    """Recompute the daily rollup for ``user_ids`` with grouped queries per batch of users."""
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), REBUILD_BATCH_SIZE):
+        batch = user_ids[start:start + REBUILD_BATCH_SIZE]
+        days = {}
+
+        def day(user_id, date):
+            if (user_id, date) not in days:
+                days[user_id, date] = UserDailyActivity(user_id=user_id, date=date)
+            return days[user_id, date]
+
+        for row in Watchlist.objects.filter(user_id__in=batch) \
+                .values('user_id', date=TruncDate('watched_at')) \
+                .annotate(count=Count('id'), runtime=Sum('movie__runtime_minutes')):
+            activity = day(row['user_id'], row['date'])
+            activity.watches = row['count']
+            activity.runtime_minutes = row['runtime'] or 0
+        for row in Review.objects.filter(user_id__in=batch) \
+                .values('user_id', date=TruncDate('created_at')) \
+                .annotate(count=Count('id'), total=Sum('rating')):
+            activity = day(row['user_id'], row['date'])
+            activity.reviews = row['count']
+            activity.rating_sum = row['total'] or 0
+
+        with transaction.atomic():
+            UserDailyActivity.objects.filter(user_id__in=batch).delete()
+            UserDailyActivity.objects.bulk_create(days.values())
+
+
+def load_daily_activity(user, since=None):
+    """The user's non-empty days, oldest first, as ``values()`` rows."""
+    activity = UserDailyActivity.objects.filter(user=user).exclude(watches=0, reviews=0)
+    if since is not None:
+        activity = activity.filter(date__gte=since)
+    return list(activity.order_by('date').values('date', 'watches', 'reviews',
+                                                   'runtime_minutes', 'rating_sum'))
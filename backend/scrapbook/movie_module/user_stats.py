@@ -0,0 +1,117 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import MovieGenre, Review, UserStats, WatchLater, Watchlist
+
+REBUILD_BATCH_SIZE = 500
+
+
+def _locked_stats(user):
+    """
+    The user's row, locked so concurrent writers cannot lose each other's
+    genre counts. Returns None for a user without a row: applying a delta
+    to zeros would hide their history, so the row is rebuilt from the
+    source tables once the write commits instead, which includes it.
+    """
+    stats = UserStats.objects.select_for_update().filter(user=user).first()
+    if stats is None:
+        transaction.on_commit(lambda: rebuild_user_stats([user.pk]))
+    return stats
+
+
+def record_watches(user, movie_ids, delta):
+    """Add (delta=1) or remove (delta=-1) watched movies from the user's totals."""
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    genres = Counter(
+        MovieGenre.objects.filter(movie_id__in=movie_ids).values_list('genre__name', flat=True)
+    )
+    with transaction.atomic():
+        stats = _locked_stats(user)
+        if stats is None:
+            return
+        stats.watched_count += delta * len(movie_ids)
+        for genre, count in genres.items():
+            remaining = stats.genre_counts.get(genre, 0) + delta * count
+            if remaining > 0:
+                stats.genre_counts[genre] = remaining
+            else:
+                stats.genre_counts.pop(genre, None)
+        stats.save()
+
+
+def record_watch_later(user, delta):
+    with transaction.atomic():
+        stats = _locked_stats(user)
+        if stats is None:
+            return
+        stats.watch_later_count += delta
+        stats.save(update_fields=['watch_later_count', 'updated_at'])
+
+
+def record_review(user, count_delta, rating_delta):
+    with transaction.atomic():
+        stats = _locked_stats(user)
+        if stats is None:
+            return
+        stats.review_count += count_delta
+        stats.rating_sum += rating_delta
+        stats.save(update_fields=['review_count', 'rating_sum', 'updated_at'])
+
+
+def refresh_review_stats(user):
+    # For writes that do not know the previous rating (see upsert_review)
+    totals = Review.objects.filter(user=user).aggregate(count=Count('id'), total=Sum('rating'))
+    with transaction.atomic():
+        stats = _locked_stats(user)
+        if stats is None:
+            return
+        stats.review_count = totals['count']
+        stats.rating_sum = totals['total'] or 0
+        stats.save(update_fields=['review_count', 'rating_sum', 'updated_at'])
+
+
+def rebuild_user_stats(user_ids):
+    """
+    Recompute UserStats for ``user_ids`` from the source tables with a
+    fixed number of grouped queries per batch of users.
+    """
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), REBUILD_BATCH_SIZE):
+        batch = user_ids[start:start + REBUILD_BATCH_SIZE]
+        stats = {user_id: UserStats(user_id=user_id, genre_counts={}) for user_id in batch}
+
+        for row in Watchlist.objects.filter(user_id__in=batch).values('user_id').annotate(count=Count('id')):
+            stats[row['user_id']].watched_count = row['count']
+        for row in WatchLater.objects.filter(user_id__in=batch).values('user_id').annotate(count=Count('id')):
+            stats[row['user_id']].watch_later_count = row['count']
+        for row in Review.objects.filter(user_id__in=batch).values('user_id') \
+                .annotate(count=Count('id'), total=Sum('rating')):
+            stats[row['user_id']].review_count = row['count']
+            stats[row['user_id']].rating_sum = row['total'] or 0
+
+        genre_counts = defaultdict(dict)
+        for user_id, genre, count in MovieGenre.objects.filter(movie__watchlist__user_id__in=batch) \
+                .values_list('movie__watchlist__user_id', 'genre__name') \
+                .annotate(count=Count('id')):
+            genre_counts[user_id][genre] = count
+        for user_id, counts in genre_counts.items():
+            stats[user_id].genre_counts = counts
+
+        UserStats.objects.bulk_create(
+            stats.values(), update_conflicts=True, unique_fields=['user'],
+            update_fields=['watched_count', 'review_count', 'rating_sum',
+                           'watch_later_count', 'genre_counts', 'updated_at'],
+        )
+
+
+def get_user_stats(user):
+    stats = UserStats.objects.filter(user=user).first()
+    if stats is None:
+        # Users active before the stats table existed are built on first read
+        rebuild_user_stats([user.pk])
+        stats = UserStats.objects.get(user=user)
+    return stats
@@ -2,97 +2,254 @@ from django.shortcuts import render, get_object_or_404
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from .models import Movie, Review, WatchLater, Watchlist
-from .serializers import (MovieSerializer, ReviewSerializer, 
-                         WatchLaterSerializer, WatchlistSerializer)
-from django.db import models
-from django.db.models import Avg, Count, Q
+from .serializers import (MovieSerializer, MovieListSerializer, MovieIngestSerializer,
+                         MovieSummarySerializer, ReviewSerializer, WatchLaterSerializer,
+                         WatchlistSerializer)
+from .pagination import KeysetPaginator, get_int_param
+from .genres import normalize_genres, sync_movie_genres
+from .search import search_movie_ids
+from .ingest import upsert_movies
+from .cache import cache_stats, get_movie_payload
+from .counters import adjust_movie_counters, adjust_counters_for_movies, refresh_review_counters
+from .user_stats import (get_user_stats, record_review, record_watch_later, record_watches,
+                         refresh_review_stats)
+from .user_activity import (load_daily_activity, record_review_activity, record_watch_activity,
+                            refresh_review_activity)
+from .reviews import upsert_review
+from .feed import ACTIVITY_TYPES, activity_feed
+from .recommendation_cache import exclude_recommendations, get_cached_recommendations, record_review_taste
+from .similarity import similar_movies
+from .imdb import MAX_SEARCH_ROWS, ImdbUnavailable, get_title, search_titles
+from .filters import filter_movies, movie_facets
+from .analytics import (DASHBOARD_SECTIONS, TIMEFRAMES, analytics_dashboard, genre_analytics,
+                        load_longest_watched, load_top_rated, load_watched_movies,
+                        rating_analytics, timeframe_start, user_highlights, user_statistics,
+                        watch_history)
+from .conditional import (movie_last_modified, movie_reviews_etag,
+                          watchlist_etag, watch_later_etag)
+from django.views.decorators.http import condition
+from rest_framework.utils.urls import replace_query_param
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
 from django.utils import timezone
-from datetime import timedelta
 from collections import defaultdict
-from django.core.cache import cache
 from rest_framework.exceptions import ValidationError
-import json
+from django.core.exceptions import ImproperlyConfigured
+import math
+
+MOVIE_LIST_ORDERINGS = ['id', '-id', 'rating', '-rating', 'num_votes', '-num_votes',
+                        'start_year', '-start_year']
+
+# Serialized movie fields that are computed from other columns
+DERIVED_MOVIE_FIELDS = {'community_rating': ['review_count', 'review_rating_sum']}
+
+def get_requested_movie_fields(request):
+    # Sparse fieldset: ?fields=id,title,genres
+    requested = request.GET.get('fields')
+    if not requested:
+        return None
+    fields = [name.strip() for name in requested.split(',') if name.strip()]
+    model_fields = {field.name for field in Movie._meta.fields} | DERIVED_MOVIE_FIELDS.keys()
+    unknown = set(fields) - model_fields
+    if unknown:
+        raise ValidationError({'fields': f'Unknown fields: {", ".join(sorted(unknown))}'})
+    return fields
+
+def get_movie_columns(fields=None):
+    # Database columns needed to serialize `fields` (the list serializer by default)
+    columns = {'id'}
+    for name in fields or MovieListSerializer.Meta.fields:
+        columns.update(DERIVED_MOVIE_FIELDS.get(name, [name]))
+    return columns
+
+def serialize_movie_list(movies, fields=None):
+    if fields:
+        return MovieSerializer(movies, many=True, fields=fields).data
+    return MovieListSerializer(movies, many=True).data
 
 @api_view(['GET'])
 def get_all_movies(request):
-    movies = Movie.objects.all()
-    serializer = MovieSerializer(movies, many=True)
-    return Response(serializer.data)
+    ordering = request.GET.get('ordering', 'id')
+    if ordering not in MOVIE_LIST_ORDERINGS:
+        raise ValidationError({'ordering': f'Must be one of {", ".join(MOVIE_LIST_ORDERINGS)}'})
+
+    fields = get_requested_movie_fields(request)
+    paginator = KeysetPaginator(ordering)
+    # Only load the columns that will be serialized (plus the keyset column)
+    movies = filter_movies(Movie.objects.all(), request)
+    columns = get_movie_columns(fields) | {paginator.field}
+    page = paginator.paginate_queryset(movies.only(*columns), request)
+    data = paginator.get_paginated_data(serialize_movie_list(page, fields))
+
+    # Facet counts cover the whole filtered set, so only compute them on request
+    if request.GET.get('facets') in ('true', '1'):
+        data['facets'] = movie_facets(movies)
+    return Response(data)
 
 @api_view(['GET'])
+def search_movies(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        raise ValidationError({'q': 'Search query is required'})
+    page = get_int_param(request, 'page', 1)
+    page_size = get_int_param(request, 'page_size', 20, maximum=100)
+
+    # Ask for one extra id to learn whether there is a next page
+    movie_ids = search_movie_ids(query, page_size + 1, (page - 1) * page_size)
+    has_next = len(movie_ids) > page_size
+    movie_ids = movie_ids[:page_size]
+
+    fields = get_requested_movie_fields(request)
+    movies = Movie.objects.only(*get_movie_columns(fields)).in_bulk(movie_ids)
+    ranked = [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
+    next_link = None
+    if has_next:
+        next_link = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+    return Response({
+        "page": page,
+        "next": next_link,
+        "results": serialize_movie_list(ranked, fields)
+    })
+
+@api_view(['GET'])
+@condition(last_modified_func=movie_last_modified)
 def get_movie_detail(request, movie_id):
-    movie = get_object_or_404(Movie, id=movie_id)
-    serializer = MovieSerializer(movie)
-    return Response(serializer.data)
+    payload = get_movie_payload(movie_id)
+    if payload is None:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(payload)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_movie_cache_stats(request):
+    return Response(cache_stats())
 
 
+def wants_movie_expansion(request):
+    expand = {name.strip() for name in request.GET.get('expand', '').split(',') if name.strip()}
+    if expand - {'movie'}:
+        raise ValidationError({'expand': 'Only "movie" can be expanded'})
+    return 'movie' in expand
+
+def serialize_user_movie_list(queryset, serializer_class, request):
+    """
+    Serialize a review / watchlist / watch later queryset in a single query,
+    joining the author (rendered by name) and, with ?expand=movie, a pruned
+    movie summary.
+    """
+    expand_movie = wants_movie_expansion(request)
+    columns = []
+    for name in serializer_class.Meta.fields:
+        if name == 'user':
+            columns.append('user__name')
+        elif name == 'movie' and expand_movie:
+            columns.extend(f'movie__{field}' for field in MovieSummarySerializer.Meta.fields)
+        else:
+            columns.append(name)
+    related = ['user', 'movie'] if expand_movie else ['user']
+    queryset = queryset.select_related(*related).only(*columns)
+    return serializer_class(queryset, many=True, expand_movie=expand_movie).data
+
 # Review related views
 @api_view(['GET'])
+@condition(etag_func=movie_reviews_etag)
 def get_movie_reviews(request, movie_id):
-    movie = get_object_or_404(Movie, id=movie_id)
-    reviews = Review.objects.filter(movie=movie)
-    serializer = ReviewSerializer(reviews, many=True)
-    return Response(serializer.data)
+    if not Movie.objects.filter(id=movie_id).exists():
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Join the author in the same query; ReviewSerializer.user only needs their name
+    reviews = Review.objects.filter(movie_id=movie_id)\
+        .select_related('user')\
+        .only('id', 'movie_id', 'rating', 'review_text', 'created_at', 'user__name')
+    paginator = KeysetPaginator('-created_at')
+    page = paginator.paginate_queryset(reviews, request)
+    serializer = ReviewSerializer(page, many=True)
+    return Response(paginator.get_paginated_data(serializer.data))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_review(request, movie_id):
-    try:
-        
-        movie = get_object_or_404(Movie, id=movie_id)
-        
-        # Check if review already exists
-        existing_review = Review.objects.filter(user=request.user, movie=movie).first()
-        
-        if existing_review:
-            # Update existing review
-            serializer = ReviewSerializer(existing_review, data=request.data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create new review
-        # Add movie to the request data
-        review_data = request.data.copy()
-        review_data['movie'] = movie.id
-        serializer = ReviewSerializer(data=review_data)
-        if serializer.is_valid():
-            serializer.save(user=request.user, movie=movie)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+    serializer = ReviewSerializer(data=request.data)
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # The previous rating is read under a row lock and the review written with
+    # one upsert, so the totals take deltas like manage_review. The movie's
+    # existence is enforced by the foreign key instead of a separate lookup
+    try:
+        with transaction.atomic():
+            old_rating = Review.objects.select_for_update() \
+                .filter(user=request.user, movie_id=movie_id) \
+                .values_list('rating', flat=True).first()
+            review, created = upsert_review(
+                request.user, movie_id,
+                serializer.validated_data['rating'],
+                serializer.validated_data.get('review_text'),
+                update_text='review_text' in serializer.validated_data,
+            )
+            if created or old_rating is not None:
+                count_delta = 1 if created else 0
+                rating_delta = review.rating - (old_rating or 0)
+                adjust_movie_counters(movie_id, review_count=count_delta, review_rating_sum=rating_delta)
+                record_review(request.user, count_delta, rating_delta)
+                record_review_activity(request.user, review.created_at, count_delta, rating_delta)
+            else:
+                # A concurrent first submit inserted the row after our read
+                refresh_review_counters(movie_id)
+                refresh_review_stats(request.user)
+                refresh_review_activity(request.user, review.created_at)
+            record_review_taste(request.user, movie_id, review.rating)
+    except IntegrityError:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(ReviewSerializer(review).data,
+                    status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 @api_view(['PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def manage_review(request, review_id):
     review = get_object_or_404(Review, id=review_id, user=request.user)
+    old_rating = review.rating
     if request.method == 'PUT':
         serializer = ReviewSerializer(review, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                review = serializer.save()
+                adjust_movie_counters(review.movie_id, review_rating_sum=review.rating - old_rating)
+                record_review(request.user, 0, review.rating - old_rating)
+                record_review_activity(request.user, review.created_at, 0, review.rating - old_rating)
+                record_review_taste(request.user, review.movie_id, review.rating)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
-        review.delete()
+        with transaction.atomic():
+            review.delete()
+            adjust_movie_counters(review.movie_id, review_count=-1, review_rating_sum=-old_rating)
+            record_review(request.user, -1, -old_rating)
+            record_review_activity(request.user, review.created_at, -1, -old_rating)
+            record_review_taste(request.user, review.movie_id, None)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # Watch Later related views
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condition(etag_func=watch_later_etag)
 def get_watch_later(request):
     watch_later = WatchLater.objects.filter(user=request.user)
-    serializer = WatchLaterSerializer(watch_later, many=True)
-    return Response(serializer.data)
+    return Response(serialize_user_movie_list(watch_later, WatchLaterSerializer, request))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_to_watch_later(request, movie_id):
     movie = get_object_or_404(Movie, id=movie_id)
-    watch_later, created = WatchLater.objects.get_or_create(user=request.user, movie=movie)
+    with transaction.atomic():
+        watch_later, created = WatchLater.objects.get_or_create(user=request.user, movie=movie)
+        if created:
+            adjust_movie_counters(movie.id, watch_later_count=1)
+            record_watch_later(request.user, 1)
     if created:
         serializer = WatchLaterSerializer(watch_later)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -103,23 +260,90 @@ def add_to_watch_later(request, movie_id):
 def remove_from_watch_later(request, movie_id):
     movie = get_object_or_404(Movie, id=movie_id)
     watch_later = get_object_or_404(WatchLater, user=request.user, movie=movie)
-    watch_later.delete()
+    with transaction.atomic():
+        watch_later.delete()
+        adjust_movie_counters(movie.id, watch_later_count=-1)
+        record_watch_later(request.user, -1)
     return Response(status=status.HTTP_204_NO_CONTENT)
 
+MAX_BULK_LIST_IDS = 500
+
+def get_bulk_movie_ids(request):
+    movie_ids = request.data.get('movie_ids') if isinstance(request.data, dict) else None
+    if not isinstance(movie_ids, list) or not movie_ids:
+        raise ValidationError({'movie_ids': 'Expected a non-empty list of movie IDs'})
+    if len(movie_ids) > MAX_BULK_LIST_IDS:
+        raise ValidationError({'movie_ids': f'At most {MAX_BULK_LIST_IDS} movie IDs per request'})
+    return list(dict.fromkeys(str(movie_id) for movie_id in movie_ids))
+
+def record_watch_later_movies(user, movie_ids, delta):
+    if movie_ids:
+        record_watch_later(user, delta * len(movie_ids))
+
+def record_watchlist_movies(user, movie_ids, delta):
+    record_watches(user, movie_ids, delta)
+    record_watch_activity(user, movie_ids, delta)
+    if delta > 0:
+        exclude_recommendations(user, movie_ids)
+
+def bulk_add_movies_to_list(request, model, counter_field, record_stats):
+    # Shared by the watchlist and watch later bulk add views
+    movie_ids = get_bulk_movie_ids(request)
+    with transaction.atomic():
+        known = set(Movie.objects.filter(id__in=movie_ids).values_list('id', flat=True))
+        present = set(model.objects.filter(user=request.user, movie_id__in=known)
+                      .values_list('movie_id', flat=True))
+        added = [movie_id for movie_id in movie_ids if movie_id in known and movie_id not in present]
+        model.objects.bulk_create(
+            [model(user=request.user, movie_id=movie_id) for movie_id in added],
+            ignore_conflicts=True
+        )
+        adjust_counters_for_movies(added, **{counter_field: 1})
+        record_stats(request.user, added, 1)
+    return Response({
+        "added": added,
+        "already_present": [movie_id for movie_id in movie_ids if movie_id in present],
+        "unknown": [movie_id for movie_id in movie_ids if movie_id not in known]
+    })
+
+def bulk_remove_movies_from_list(request, model, counter_field, record_stats):
+    movie_ids = get_bulk_movie_ids(request)
+    with transaction.atomic():
+        entries = model.objects.filter(user=request.user, movie_id__in=movie_ids)
+        present = set(entries.values_list('movie_id', flat=True))
+        removed = [movie_id for movie_id in movie_ids if movie_id in present]
+        # Stats hooks may read the entries, so they run before the delete
+        record_stats(request.user, removed, -1)
+        entries.delete()
+        adjust_counters_for_movies(removed, **{counter_field: -1})
+    return Response({
+        "removed": removed,
+        "not_present": [movie_id for movie_id in movie_ids if movie_id not in present]
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_add_to_watch_later(request):
+    return bulk_add_movies_to_list(request, WatchLater, 'watch_later_count', record_watch_later_movies)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_remove_from_watch_later(request):
+    return bulk_remove_movies_from_list(request, WatchLater, 'watch_later_count', record_watch_later_movies)
+
 # User's movie-related views
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_reviews(request):
     reviews = Review.objects.filter(user=request.user)
-    serializer = ReviewSerializer(reviews, many=True)
-    return Response(serializer.data)
+    return Response(serialize_user_movie_list(reviews, ReviewSerializer, request))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condition(etag_func=watch_later_etag)
 def get_user_watch_later(request):
     watch_later = WatchLater.objects.filter(user=request.user)
-    serializer = WatchLaterSerializer(watch_later, many=True)
-    return Response(serializer.data)
+    return Response(serialize_user_movie_list(watch_later, WatchLaterSerializer, request))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -131,15 +355,7 @@ def add_movie(request):
             return Response({'error': 'Movie ID is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Ensure genres is a list
-        genres = request.data.get('genres', [])
-        if isinstance(genres, str):
-            try:
-                genres = json.loads(genres)
-            except json.JSONDecodeError:
-                genres = [genres]
-        elif not isinstance(genres, list):
-            genres = [str(genres)]
-            
+        genres = normalize_genres(request.data.get('genres', []))
             
         movie, created = Movie.objects.get_or_create(
             id=movie_id,
@@ -164,12 +380,15 @@ def add_movie(request):
         )
         
         if created:
+            sync_movie_genres([movie])
             serializer = MovieSerializer(movie)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             # Update existing movie if needed
             update_data = request.data.copy()
-            update_data['genres'] = genres  # Ensure genres is updated correctly
+            # A payload without genres keeps the stored ones
+            if 'genres' in request.data:
+                update_data['genres'] = genres
             serializer = MovieSerializer(movie, data=update_data, partial=True)
             if serializer.is_valid():
                 serializer.save()
@@ -179,19 +398,73 @@ def add_movie(request):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+MAX_BULK_MOVIES = 500
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_add_movies(request):
+    payloads = request.data
+    if not isinstance(payloads, list):
+        return Response({'error': 'Expected a list of movies'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(payloads) > MAX_BULK_MOVIES:
+        return Response({'error': f'At most {MAX_BULK_MOVIES} movies per request'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    ids = [item.get('id') for item in payloads if isinstance(item, dict)]
+    existing = set(Movie.objects.filter(id__in=[i for i in ids if isinstance(i, str) and i])
+                   .values_list('id', flat=True))
+
+    # Validate everything up front; existing movies only need the fields being changed
+    results = []
+    valid = {}
+    for item in payloads:
+        if not isinstance(item, dict):
+            results.append({'id': None, 'status': 'error', 'errors': {'non_field_errors': ['Expected an object']}})
+            continue
+        movie_id = item.get('id')
+        if not isinstance(movie_id, str):
+            # Checked before any set lookup: lists and dicts are unhashable
+            results.append({'id': None, 'status': 'error', 'errors': {'id': ['Expected a string movie ID']}})
+            continue
+        serializer = MovieIngestSerializer(data=item, partial=movie_id in existing)
+        if not serializer.is_valid():
+            results.append({'id': movie_id, 'status': 'error', 'errors': serializer.errors})
+        elif movie_id in valid:
+            results.append({'id': movie_id, 'status': 'error',
+                            'errors': {'id': ['Duplicate movie id in request']}})
+        else:
+            valid[movie_id] = serializer.validated_data
+            results.append({'id': movie_id, 'status': 'updated' if movie_id in existing else 'created'})
+
+    upsert_movies(valid, existing)
+
+    counts = defaultdict(int)
+    for result in results:
+        counts[result['status']] += 1
+    return Response({
+        "created": counts['created'],
+        "updated": counts['updated'],
+        "errors": counts['error'],
+        "results": results
+    })
+
 # Watchlist related views
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condition(etag_func=watchlist_etag)
 def get_watchlist(request):
     watchlist = Watchlist.objects.filter(user=request.user)
-    serializer = WatchlistSerializer(watchlist, many=True)
-    return Response(serializer.data)
+    return Response(serialize_user_movie_list(watchlist, WatchlistSerializer, request))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_to_watchlist(request, movie_id):
     movie = get_object_or_404(Movie, id=movie_id)
-    watchlist, created = Watchlist.objects.get_or_create(user=request.user, movie=movie)
+    with transaction.atomic():
+        watchlist, created = Watchlist.objects.get_or_create(user=request.user, movie=movie)
+        if created:
+            adjust_movie_counters(movie.id, watch_count=1)
+            record_watchlist_movies(request.user, [movie.id], 1)
     if created:
         serializer = WatchlistSerializer(watchlist)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -202,336 +475,110 @@ def add_to_watchlist(request, movie_id):
 def remove_from_watchlist(request, movie_id):
     movie = get_object_or_404(Movie, id=movie_id)
     watchlist = get_object_or_404(Watchlist, user=request.user, movie=movie)
-    watchlist.delete()
+    with transaction.atomic():
+        record_watchlist_movies(request.user, [movie.id], -1)
+        watchlist.delete()
+        adjust_movie_counters(movie.id, watch_count=-1)
     return Response(status=status.HTTP_204_NO_CONTENT)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_add_to_watchlist(request):
+    return bulk_add_movies_to_list(request, Watchlist, 'watch_count', record_watchlist_movies)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_remove_from_watchlist(request):
+    return bulk_remove_movies_from_list(request, Watchlist, 'watch_count', record_watchlist_movies)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condition(etag_func=watchlist_etag)
 def get_user_watchlist(request):
     watchlist = Watchlist.objects.filter(user=request.user)
-    serializer = WatchlistSerializer(watchlist, many=True)
-    return Response(serializer.data)
+    return Response(serialize_user_movie_list(watchlist, WatchlistSerializer, request))
+
+MAX_MOVIE_STATE_IDS = 500
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_user_statistics(request):
+def get_movie_states(request):
+    movie_ids = list(dict.fromkeys(i.strip() for i in request.GET.get('ids', '').split(',') if i.strip()))
+    if not movie_ids:
+        raise ValidationError({'ids': 'At least one movie ID is required'})
+    if len(movie_ids) > MAX_MOVIE_STATE_IDS:
+        raise ValidationError({'ids': f'At most {MAX_MOVIE_STATE_IDS} movie IDs per request'})
+
+    # Three lookups on the (user, movie) unique indexes, independent of history size
     user = request.user
-    
-    # Get counts and averages
-    watched_movies = Watchlist.objects.filter(user=user)
-    reviews = Review.objects.filter(user=user)
-    watch_later = WatchLater.objects.filter(user=user)
-    
-    # Calculate genre statistics
-    genres_watched = set()
-    genre_counts = defaultdict(int)
-    
-    for watch in watched_movies:
-        if watch.movie.genres:
-            for genre in watch.movie.genres:
-                genres_watched.add(genre)
-                genre_counts[genre] += 1
-    
-    most_watched = max(genre_counts.items(), key=lambda x: x[1])[0] if genre_counts else None
-    
-    # Calculate review completion rate
-    total_watched = watched_movies.count()
-    total_reviewed = reviews.count()
-    completion_rate = (total_reviewed / total_watched * 100) if total_watched > 0 else 0
-    
-    response_data = {
-        "total_movies_watched": total_watched,
-        "total_reviews": total_reviewed,
-        "average_rating": reviews.aggregate(Avg('rating'))['rating__avg'] or 0,
-        "watchlist_count": watched_movies.count(),
-        "watch_later_count": watch_later.count(),
-        "total_genres_watched": len(genres_watched),
-        "most_watched_genre": most_watched,
-        "review_completion_rate": round(completion_rate, 1)
-    }
-    
-    return Response(response_data)
+    watched = set(Watchlist.objects.filter(user=user, movie_id__in=movie_ids)
+                  .values_list('movie_id', flat=True))
+    watch_later = set(WatchLater.objects.filter(user=user, movie_id__in=movie_ids)
+                      .values_list('movie_id', flat=True))
+    ratings = dict(Review.objects.filter(user=user, movie_id__in=movie_ids)
+                   .values_list('movie_id', 'rating'))
+
+    return Response({
+        movie_id: {
+            "watched": movie_id in watched,
+            "watch_later": movie_id in watch_later,
+            "rating": ratings.get(movie_id)
+        }
+        for movie_id in movie_ids
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_user_statistics(request):
+    # Single primary key read of the incrementally maintained totals
+    return Response(user_statistics(get_user_stats(request.user)))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_recent_activity(request):
-    user = request.user
-    
-    # Combine different activities
-    activities = []
-    
-    # Add reviews
-    reviews = Review.objects.filter(user=user).select_related('movie')
-    for review in reviews:
-        activities.append({
-            "type": "review",
-            "movie": {
-                "id": review.movie.id,
-                "title": review.movie.title,
-                "image_url": review.movie.image_url
-            },
-            "action_date": review.created_at,
-            "details": {
-                "rating": review.rating,
-                "review_snippet": review.review_text[:100] if review.review_text else None
-            }
-        })
-    
-    # Add watches
-    watches = Watchlist.objects.filter(user=user).select_related('movie')
-    for watch in watches:
-        activities.append({
-            "type": "watch",
-            "movie": {
-                "id": watch.movie.id,
-                "title": watch.movie.title,
-                "image_url": watch.movie.image_url
-            },
-            "action_date": watch.watched_at,
-            "details": {}
-        })
-    
-    # Sort by date
-    activities.sort(key=lambda x: x['action_date'], reverse=True)
-    
+    # Newest-first page of reviews and watches; see movie_module.feed
+    limit = get_int_param(request, 'limit', 20, maximum=100)
+    types = None
+    if request.GET.get('type'):
+        types = request.GET['type'].split(',')
+        if not set(types) <= set(ACTIVITY_TYPES):
+            raise ValidationError({'type': f"Expected one of: {', '.join(ACTIVITY_TYPES)}"})
+    activities, next_cursor = activity_feed(request.user, limit, request.GET.get('before'), types)
+
+    stats = get_user_stats(request.user)
+    totals = {'review': stats.review_count, 'watch': stats.watched_count}
     return Response({
         "activities": activities,
-        "total_activities": len(activities)
+        "total_activities": sum(totals[kind] for kind in types or ACTIVITY_TYPES),
+        "next": replace_query_param(request.build_absolute_uri(), 'before', next_cursor) if next_cursor else None,
+        "next_before": next_cursor
     })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_genre_analytics(request):
-    user = request.user
-    
-    
-    # Get all watched movies with their genres and reviews
-    watched_movies = Watchlist.objects.filter(user=user).select_related('movie')
-    
-    # Initialize counters
-    genre_distribution = defaultdict(int)
-    genre_ratings = defaultdict(list)
-    
-    for watch in watched_movies:
-        
-        if watch.movie.genres:  # Check if genres exist
-            # Handle both string and list formats
-            genres = watch.movie.genres
-            if isinstance(genres, str):
-                try:
-                    genres = json.loads(genres)
-                except json.JSONDecodeError:
-                    genres = [genres]
-            elif not isinstance(genres, list):
-                genres = [str(genres)]
-            
-            # Ensure genres is a list
-            if not isinstance(genres, list):
-                genres = [str(genres)]
-            
-            for genre in genres:
-                # Ensure genre is a string
-                genre_str = str(genre).strip()
-                if genre_str:
-                    genre_distribution[genre_str] += 1
-                
-                    # Get rating if exists
-                    review = Review.objects.filter(user=user, movie=watch.movie).first()
-                    if review:
-                        genre_ratings[genre_str].append(review.rating)
-        
-    # Calculate favorite genres
-    favorite_genres = []
-    for genre, count in genre_distribution.items():
-        avg_rating = None
-        if genre_ratings[genre]:
-            avg_rating = sum(genre_ratings[genre]) / len(genre_ratings[genre])
-        
-        favorite_genres.append({
-            "genre": genre,
-            "movie_count": count,
-            "average_rating": round(avg_rating, 1) if avg_rating is not None else None
-        })
-    
-    # Calculate trending genres (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_watches = Watchlist.objects.filter(
-        user=user,
-        watched_at__gte=thirty_days_ago
-    ).select_related('movie')
-    
-    trending = defaultdict(int)
-    for watch in recent_watches:
-        if watch.movie.genres:
-            genres = watch.movie.genres
-            if isinstance(genres, str):
-                try:
-                    genres = json.loads(genres)
-                except json.JSONDecodeError:
-                    genres = [genres]
-            elif not isinstance(genres, list):
-                genres = [str(genres)]
-                
-            for genre in genres:
-                genre_str = str(genre).strip()
-                if genre_str:
-                    trending[genre_str] += 1
-    
-    trending_genres = [
-        {
-            "genre": genre,
-            "recent_watches": count,
-            "last_30_days": True
-        }
-        for genre, count in trending.items()
-    ]
-    
-    response_data = {
-        "distribution": dict(genre_distribution),
-        "favorite_genres": sorted(favorite_genres, key=lambda x: x['movie_count'], reverse=True),
-        "trending_genres": sorted(trending_genres, key=lambda x: x['recent_watches'], reverse=True)
-    }
-    
-    
-    return Response(response_data)
+    # One query for the watched movies and ratings, aggregated in a single pass
+    watches = load_watched_movies(request.user)
+    return Response(genre_analytics(watches))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_rating_analytics(request):
-    user = request.user
-    
-    # Get all user reviews
-    reviews = Review.objects.filter(user=user).select_related('movie')
-    
-    # Calculate rating distribution
-    distribution = {
-        '5_stars': 0,
-        '4_stars': 0,
-        '3_stars': 0,
-        '2_stars': 0,
-        '1_star': 0
-    }
-    
-    for review in reviews:
-        rating = int(round(review.rating))
-        if rating == 5:
-            distribution['5_stars'] += 1
-        elif rating == 4:
-            distribution['4_stars'] += 1
-        elif rating == 3:
-            distribution['3_stars'] += 1
-        elif rating == 2:
-            distribution['2_stars'] += 1
-        else:
-            distribution['1_star'] += 1
-    
-    # Calculate average by genre
-    genre_ratings = defaultdict(list)
-    for review in reviews:
-        if review.movie.genres:
-            for genre in review.movie.genres:
-                genre_ratings[genre].append(review.rating)
-    
-    average_by_genre = {
-        genre: round(sum(ratings)/len(ratings), 1)
-        for genre, ratings in genre_ratings.items()
-    }
-    
-    # Calculate rating trends
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    sixty_days_ago = timezone.now() - timedelta(days=60)
-    
-    recent_ratings = reviews.filter(created_at__gte=thirty_days_ago)
-    previous_ratings = reviews.filter(
-        created_at__gte=sixty_days_ago,
-        created_at__lt=thirty_days_ago
-    )
-    
-    recent_avg = recent_ratings.aggregate(Avg('rating'))['rating__avg'] or 0
-    previous_avg = previous_ratings.aggregate(Avg('rating'))['rating__avg'] or 0
-    
-    trend = "increasing" if recent_avg > previous_avg else "decreasing" if recent_avg < previous_avg else "stable"
-    
-    return Response({
-        "distribution": distribution,
-        "average_by_genre": average_by_genre,
-        "rating_trends": {
-            "last_30_days": round(recent_avg, 1),
-            "previous_30_days": round(previous_avg, 1),
-            "trend": trend
-        }
-    })
+    return Response(rating_analytics(request.user))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_watch_history(request):
     try:
         timeframe = request.GET.get('timeframe', 'month')
-        if timeframe not in ['week', 'month', 'year']:
+        if timeframe not in TIMEFRAMES:
             raise ValidationError({'timeframe': 'Invalid timeframe parameter'})
-            
-        user = request.user
-        
-        # Calculate date range based on timeframe
-        end_date = timezone.now()
-        if timeframe == 'week':
-            start_date = end_date - timedelta(days=7)
-        elif timeframe == 'year':
-            start_date = end_date - timedelta(days=365)
-        else:  # month
-            start_date = end_date - timedelta(days=30)
-        
-        # Get watches within timeframe
-        watches = Watchlist.objects.filter(
-            user=user,
-            watched_at__gte=start_date,
-            watched_at__lte=end_date
-        ).select_related('movie')
-        
-        # Group watches by date
-        timeline = defaultdict(list)
-        total_runtime = 0
-        
-        for watch in watches:
-            date_str = watch.watched_at.date().isoformat()
-            review = Review.objects.filter(user=user, movie=watch.movie).first()
-            
-            movie_data = {
-                "id": watch.movie.id,
-                "title": watch.movie.title,
-                "rating": review.rating if review else None
-            }
-            
-            timeline[date_str].append(movie_data)
-            total_runtime += watch.movie.runtime_minutes or 0
-        
-        # Calculate daily average
-        days_in_range = (end_date - start_date).days or 1
-        daily_average = len(watches) / days_in_range
-        
-        # Find most active day
-        day_counts = defaultdict(int)
-        for watch in watches:
-            day_name = watch.watched_at.strftime('%A')
-            day_counts[day_name] += 1
-        
-        most_active_day = max(day_counts.items(), key=lambda x: x[1])[0] if day_counts else None
-        
-        return Response({
-            "timeline": [
-                {
-                    "date": date,
-                    "movies_watched": len(movies),
-                    "movies": movies
-                }
-                for date, movies in timeline.items()
-            ],
-            "summary": {
-                "daily_average": round(daily_average, 1),
-                "most_active_day": most_active_day,
-                "total_watch_time": total_runtime
-            }
-        })
+
+        now = timezone.now()
+        start_date = timeframe_start(timeframe, now)
+        watches = load_watched_movies(request.user, since=start_date)
+        activity = load_daily_activity(request.user, since=timezone.localdate(start_date))
+        return Response(watch_history(watches, activity, timeframe, now))
     except Exception as e:
         return Response(
             {'error': str(e)}, 
@@ -542,78 +589,106 @@ def get_watch_history(request):
 @permission_classes([IsAuthenticated])
 def get_user_highlights(request):
     user = request.user
-    
-    # Get top rated movies
-    top_rated = Review.objects.filter(user=user)\
-        .select_related('movie')\
-        .order_by('-rating')[:5]
-    
-    top_rated_movies = [
-        {
-            "id": review.movie.id,
-            "title": review.movie.title,
-            "rating": review.rating,
-            "review_date": review.created_at
-        }
-        for review in top_rated
-    ]
-    
-    # Get longest movies watched
-    longest_movies = Watchlist.objects.filter(user=user)\
-        .select_related('movie')\
-        .order_by('-movie__runtime_minutes')[:5]
-    
-    longest_movies_data = [
-        {
-            "id": watch.movie.id,
-            "title": watch.movie.title,
-            "runtime_minutes": watch.movie.runtime_minutes
-        }
-        for watch in longest_movies
-        if watch.movie.runtime_minutes  # Only include movies with runtime data
-    ]
-    
-    # Calculate watching streak
-    watches = Watchlist.objects.filter(user=user)\
-        .order_by('watched_at')
-    
-    current_streak = 0
-    longest_streak = 0
-    current_date = timezone.now().date()
-    
-    # Get unique dates of watches
-    watch_dates = set(watch.watched_at.date() for watch in watches)
-    total_active_days = len(watch_dates)
-    
-    # Calculate streaks
-    if watch_dates:
-        current_streak = 0
-        for i in range(30):  # Check last 30 days
-            check_date = current_date - timedelta(days=i)
-            if check_date in watch_dates:
-                current_streak += 1
-            else:
-                break
-        
-        # Calculate longest streak
-        longest_streak = 0
-        temp_streak = 0
-        sorted_dates = sorted(watch_dates)
-        for i in range(len(sorted_dates)):
-            if i > 0 and (sorted_dates[i] - sorted_dates[i-1]).days == 1:
-                temp_streak += 1
-            else:
-                temp_streak = 1
-            longest_streak = max(longest_streak, temp_streak)
-    
+    return Response(user_highlights(load_top_rated(user), load_longest_watched(user),
+                                    load_daily_activity(user)))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_analytics_dashboard(request):
+    sections = DASHBOARD_SECTIONS
+    if request.GET.get('sections'):
+        sections = [section.strip() for section in request.GET['sections'].split(',') if section.strip()]
+        unknown = [section for section in sections if section not in DASHBOARD_SECTIONS]
+        if unknown:
+            raise ValidationError({'sections': f"Unknown sections: {', '.join(unknown)}"})
+        # Canonical order so equivalent requests share a cache entry
+        sections = [section for section in DASHBOARD_SECTIONS if section in sections]
+
+    timeframe = request.GET.get('timeframe', 'month')
+    if timeframe not in TIMEFRAMES:
+        raise ValidationError({'timeframe': 'Invalid timeframe parameter'})
+
+    return Response(analytics_dashboard(request.user, sections, timeframe))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_recommendations(request):
+    # Cached per user over the rows precomputed by manage.py precompute_recommendations;
+    # see movie_module.recommendation_cache
+    limit = get_int_param(request, 'limit', 20, maximum=100)
+    expand_movie = wants_movie_expansion(request)
+    recommendations = get_cached_recommendations(request.user, limit)
+
+    # Cached results may name movies deleted since
+    columns = MovieSummarySerializer.Meta.fields if expand_movie else ['id']
+    movies = Movie.objects.only(*columns).in_bulk([movie_id for movie_id, _ in recommendations])
     return Response({
-        "top_rated_movies": top_rated_movies,
-        "longest_movies_watched": longest_movies_data,
-        "watching_streak": {
-            "current_streak": current_streak,
-            "longest_streak": longest_streak,
-            "total_active_days": total_active_days
-        }
+        "results": [
+            {
+                "movie": MovieSummarySerializer(movies[movie_id]).data if expand_movie else movie_id,
+                "score": round(score, 4)
+            }
+            for movie_id, score in recommendations
+            if movie_id in movies
+        ]
+    })
+
+@api_view(['GET'])
+def get_similar_movies(request, movie_id):
+    # Content-based neighbors from the memory-mapped feature matrix; see movie_module.similarity
+    limit = get_int_param(request, 'limit', 20, maximum=100)
+    expand_movie = wants_movie_expansion(request)
+    try:
+        similar = similar_movies(movie_id, limit)
+    except Movie.DoesNotExist:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if similar is None:
+        return Response({'detail': 'Similar movies are not available yet.'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    # The index may name movies deleted since it was built
+    columns = MovieSummarySerializer.Meta.fields if expand_movie else ['id']
+    movies = Movie.objects.only(*columns).in_bulk([similar_id for similar_id, _ in similar])
+    return Response({
+        "results": [
+            {
+                "movie": MovieSummarySerializer(movies[similar_id]).data if expand_movie else similar_id,
+                "score": round(score, 4)
+            }
+            for similar_id, score in similar
+            if similar_id in movies
+        ]
     })
 
+# Server-side RapidAPI IMDb gateway; see movie_module.imdb. Signed-in users only,
+# as lookups spend the RapidAPI quota and write to the movie table
+def imdb_unavailable(error):
+    response = Response({'detail': str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if getattr(error, 'retry_after', None):
+        response['Retry-After'] = str(math.ceil(error.retry_after))
+    return response
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_imdb(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        raise ValidationError({'q': 'Search query is required'})
+    page = get_int_param(request, 'page', 1)
+    rows = get_int_param(request, 'rows', 24, maximum=MAX_SEARCH_ROWS)
+    try:
+        results = search_titles(query, page, rows)
+    except (ImdbUnavailable, ImproperlyConfigured) as e:
+        return imdb_unavailable(e)
+    return Response({"page": page, "results": results})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_imdb_title(request, movie_id):
+    try:
+        title = get_title(movie_id)
+    except (ImdbUnavailable, ImproperlyConfigured) as e:
+        return imdb_unavailable(e)
+    if title is None:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(title)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -100,6 +101,32 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Serialized movie detail payloads (see movie_module/cache.py). Use
+    # 'django.core.cache.backends.filebased.FileBasedCache' with a directory
+    # LOCATION to share the cache between worker processes.
+    'movies': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'movies',
+        'TIMEOUT': 60 * 15,
+    },
+    # RapidAPI IMDb responses (see movie_module/imdb.py), kept on disk across
+    # restarts; entries carry their own TTL
+    'imdb': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'imdb_cache',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -154,4 +181,13 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
-AUTH_USER_MODEL = 'authentication.User' 
\ No newline at end of file
+AUTH_USER_MODEL = 'authentication.User' 
+
+# Server-side RapidAPI IMDb gateway. Point IMDB_API_BASE_URL at a local
+# server to develop against a fake IMDb API.
+IMDB_API_BASE_URL = os.environ.get('IMDB_API_BASE_URL', 'https://imdb236.p.rapidapi.com/imdb')
+IMDB_API_HOST = 'imdb236.p.rapidapi.com'
+IMDB_API_KEY = os.environ.get('RAPIDAPI_KEY', '')
+# Token bucket per server process: requests per second and burst size
+IMDB_API_RATE_LIMIT = 5
+IMDB_API_BURST = 10
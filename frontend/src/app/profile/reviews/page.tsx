@@ -35,8 +35,8 @@ export default function ReviewsPage() {
 
   const fetchReviews = async () => {
     try {
-      const data = await movieApi.getRecentActivity()
-      const reviewActivities = data.activities.filter((a): a is ReviewActivity => a.type === "review")
+      const activities = await movieApi.getAllActivity("review")
+      const reviewActivities = activities.filter((a): a is ReviewActivity => a.type === "review")
       setReviews(reviewActivities)
     } catch (error) {
       console.error("Error fetching reviews:", error)
@@ -34,8 +34,11 @@ export default function RecentReviews({ fullView = false }: Props) {
   useEffect(() => {
     const fetchReviews = async () => {
       try {
-        const data = await movieApi.getRecentActivity()
-        const reviewActivities = data.activities.filter((a): a is ReviewActivity => a.type === "review")
+        // The full view lists every review; the profile summary only the latest page
+        const activities = fullView
+          ? await movieApi.getAllActivity("review")
+          : (await movieApi.getRecentActivity({ type: "review", limit: 100 })).activities
+        const reviewActivities = activities.filter((a): a is ReviewActivity => a.type === "review")
         setReviews(reviewActivities)
       } catch (error) {
         console.error("Error fetching reviews:", error)
@@ -45,7 +48,7 @@ export default function RecentReviews({ fullView = false }: Props) {
     }
 
     fetchReviews()
-  }, [])
+  }, [fullView])
 
   if (loading) {
     return (
@@ -90,38 +90,28 @@ export const movieApi = {
 
   searchMovies: async (searchTerm: string, page: number = 1, pageSize: number = 24): Promise<Movie[]> => {
     try {
-      const response = await rapidApiInstance.get(
-        `https://${RAPIDAPI_HOST}/imdb/search`,
-        {
-          params: {
-            type: 'movie',
-            primaryTitleAutocomplete: searchTerm,
-            rows: pageSize.toString(),
-            page: page.toString()
-          }
+      // Search movies we already store first; only go to RapidAPI on a miss
+      const local = await axiosInstance.get('/movies/search/', {
+        params: {
+          q: searchTerm,
+          page,
+          page_size: pageSize,
+          fields: 'id,title,image_url,rating,release_date,genres'
         }
-      );
+      });
+      if (local.data.results.length > 0) {
+        return local.data.results;
+      }
+    } catch (error) {
+      console.error('Error searching local movies:', error);
+    }
 
-      // The search results are in response.data.results
-      return response.data.results.map((movie: any) => ({
-        id: movie.id,
-        title: movie.primaryTitle,
-        original_title: movie.originalTitle,
-        description: movie.description || '',
-        image_url: movie.primaryImage,
-        release_date: movie.releaseDate,
-        start_year: movie.startYear,
-        end_year: movie.endYear,
-        runtime_minutes: movie.runtimeMinutes,
-        genres: movie.genres || [],
-        language: movie.spokenLanguages?.[0] || 'en',
-        countries: movie.countriesOfOrigin || [],
-        rating: movie.averageRating,
-        num_votes: movie.numVotes,
-        budget: movie.budget,
-        gross_worldwide: movie.grossWorldwide,
-        is_adult: movie.isAdult
-      }));
+    try {
+      // Cached, rate limited and stored server-side by the backend IMDb gateway
+      const response = await axiosInstance.get('/imdb/search/', {
+        params: { q: searchTerm, page, rows: pageSize }
+      });
+      return response.data.results;
     } catch (error) {
       console.error('Error searching movies:', error);
       throw error;
@@ -204,17 +194,10 @@ export const movieApi = {
 
   getMovie: async (id: string): Promise<Movie> => {
     try {
-      const response = await axiosInstance.get<RapidAPIMovie>(`https://imdb236.p.rapidapi.com/imdb/${id}`, {
-        headers: rapidApiHeaders
-      });
-      
-      return mapMovieData(response.data);
-    } catch (error: any) {
-      console.error('RapidAPI Error Details:', {
-        message: error.message,
-        response: error.response?.data,
-        headers: rapidApiHeaders
-      });
+      const response = await axiosInstance.get<Movie>(`/imdb/titles/${id}/`);
+      return response.data;
+    } catch (error) {
+      console.error('Error fetching movie:', error);
       throw error;
     }
   },
@@ -379,9 +362,11 @@ export const movieApi = {
   },
 
   // Recent Activity Feed
-  getRecentActivity: async (): Promise<RecentActivity> => {
+  getRecentActivity: async (
+    params: { type?: 'review' | 'watch'; limit?: number; before?: string } = {}
+  ): Promise<RecentActivity> => {
     try {
-      const response = await axiosInstance.get('/users/recent-activity/');
+      const response = await axiosInstance.get('/users/recent-activity/', { params });
       return response.data;
     } catch (error) {
       console.error('Error fetching recent activity:', error);
@@ -389,6 +374,18 @@ export const movieApi = {
     }
   },
 
+  // Every activity of one type, following the before cursor page by page
+  getAllActivity: async (type: 'review' | 'watch'): Promise<RecentActivity['activities']> => {
+    const activities: RecentActivity['activities'] = [];
+    let before: string | undefined;
+    do {
+      const page = await movieApi.getRecentActivity({ type, limit: 100, before });
+      activities.push(...page.activities);
+      before = page.next_before ?? undefined;
+    } while (before);
+    return activities;
+  },
+
   // Genre Analytics
   getGenreAnalytics: async (): Promise<GenreAnalytics> => {
     try {
@@ -24,6 +24,8 @@ export interface RecentActivity {
     };
   }>;
   total_activities: number;
+  next: string | null;
+  next_before: string | null;
 }
 
 export interface GenreAnalytics {